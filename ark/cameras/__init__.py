@@ -330,7 +330,6 @@ class ARK_PT_PROPERTIES_Scene(bpy.types.Panel):
             body = col.box()
 
             blcol_cameras = utils.bpy.col.obt(preferences.container_cameras, local=True)
-            common.set_camera_list(session.cameras, blcol_cameras)
             bl_cam = scene.camera
 
             body.template_list(
@@ -461,15 +460,44 @@ class ARK_PT_PROPERTIES_Scene(bpy.types.Panel):
                 col.row(align=True).prop(pr_scene.queue, "mode", expand=True)
                 col.prop(pr_scene.queue, "slots", toggle=True)
                 col.prop(pr_scene.queue, "export", toggle=True)
+                sub = col.row(align=True)
+                sub.enabled = pr_scene.queue.export
+                sub.prop(pr_scene.queue, "use_resume", toggle=True)
+                col.prop(pr_scene.queue, "use_study", toggle=True)
+
+                if pr_scene.queue.use_study:
+                    row = section.row()
+                    row.template_list(
+                        queue.ARK_UL_PROPERTIES_ShadowStudy.__name__,
+                        "",
+                        pr_scene.queue,
+                        "study",
+                        pr_scene.queue,
+                        "study_index",
+                        rows = 3,
+                    )
+                    col = row.column(align=True)
+                    col.operator(queue.ARK_OT_AddStudySlot.bl_idname, icon='ADD')
+                    col.operator(queue.ARK_OT_RemoveStudySlot.bl_idname, icon='REMOVE')
+                    col.separator()
+                    col.operator(queue.ARK_OT_PresetStudySlots.bl_idname, icon='PRESET')
 
                 col = section.column(align=True)
-                op = col.operator(
-                    queue.ARK_OT_RenderQueue.bl_idname,
-                    text="Render!",
-                )
-                op.mode = pr_scene.queue.mode
-                op.slots = pr_scene.queue.slots
-                op.export = pr_scene.queue.export
+                job = queue.render_job
+                if job is not None:
+                    row = col.row(align=True)
+                    row.progress(factor=job.progress, type='BAR', text=f"Rendering {job.done}/{job.total}")
+                    row.operator(queue.ARK_OT_CancelRenderQueue.bl_idname, icon='CANCEL')
+                else:
+                    op = col.operator(
+                        queue.ARK_OT_RenderQueue.bl_idname,
+                        text="Render!",
+                    )
+                    op.mode = pr_scene.queue.mode
+                    op.slots = pr_scene.queue.slots
+                    op.export = pr_scene.queue.export
+                    op.study = pr_scene.queue.use_study
+                    op.resume = pr_scene.queue.use_resume
         return None
 
 class ARK_UL_PROPERTIES_CameraList(bpy.types.UIList):
@@ -537,7 +565,9 @@ class ARK_UL_PROPERTIES_CameraList(bpy.types.UIList):
 
         filtered = []
         ordered = []
-        items = [item.object for item in getattr(data, propname)]
+        items = common.camera_registry.cameras
+        if len(items) != len(getattr(data, propname)):
+            items = [item.object for item in getattr(data, propname)]
 
         filtered = helper_funcs.filter_items_by_name(self.filter_name, self.bitflag_filter_item, items, "name", reverse=False)
 
@@ -582,6 +612,7 @@ class Preferences_Cameras(bpy.types.PropertyGroup):
     container_cameras : bpy.props.StringProperty(
         name = "Cameras",
         default = "#Cameras",
+        update = common.update_container_cameras,
     )
 
     container_props : bpy.props.StringProperty(
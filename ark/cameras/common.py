@@ -150,10 +150,85 @@ def get_camera_list(container, context, mode=None):
         case _:
             return []
 
-def set_camera_list(collection_prop, container):
-    collection_prop.clear()
-    for obj in container.all_objects:
-                if obj.type == 'CAMERA':
-                    _ = collection_prop.add()
-                    _.object = obj
-    return
+class CameraRegistry():
+    """Cameras of the camera container, mirrored into the session cameras
+    for the UIList. Synced from depsgraph, load and undo handlers so drawing
+    only has to read it.
+    """
+    def __init__(self):
+        self.cameras = []
+        self.uids = []
+        return None
+
+    def sync(self, collection_prop, container):
+        cameras = [] if container is None else [obj for obj in container.all_objects if obj.type == 'CAMERA']
+        uids = [obj.session_uid for obj in cameras]
+        # NOTE: Renames keep the pointers in {collection_prop} valid, only
+        ## added, removed or reordered cameras need it rebuilt.
+        if uids != self.uids or len(collection_prop) != len(cameras):
+            collection_prop.clear()
+            for obj in cameras:
+                _ = collection_prop.add()
+                _.object = obj
+        self.cameras = cameras
+        self.uids = uids
+        return None
+
+    def clear(self):
+        self.cameras = []
+        self.uids = []
+        return None
+
+camera_registry = CameraRegistry()
+
+def sync_camera_registry():
+    session = addon.get_property("window_manager", parent=True)
+    if session is None:
+        return None
+    blcol_cameras = utils.bpy.col.obt(addon.parent_preferences.container_cameras, local=True)
+    camera_registry.sync(session.cameras, blcol_cameras)
+    return None
+
+def update_container_cameras(self, context):
+    sync_camera_registry()
+    return None
+
+@bpy.app.handlers.persistent
+def camera_registry_depsgraph(scene, depsgraph):
+    # NOTE: Linking, unlinking or deleting objects tags their collections
+    ## or the scene, transforms and data edits don't need a sync.
+    for update in depsgraph.updates:
+        if isinstance(update.id, (bpy.types.Collection, bpy.types.Scene)):
+            sync_camera_registry()
+            break
+    return None
+
+@bpy.app.handlers.persistent
+def camera_registry_reload(*args):
+    # NOTE: Objects from before a load or undo step are no longer valid.
+    camera_registry.clear()
+    sync_camera_registry()
+    return None
+
+HANDLERS = {
+    "depsgraph_update_post" : camera_registry_depsgraph,
+    "load_post" : camera_registry_reload,
+    "undo_post" : camera_registry_reload,
+    "redo_post" : camera_registry_reload,
+}
+
+def register():
+    for name, handler in HANDLERS.items():
+        getattr(bpy.app.handlers, name).append(handler)
+    # NOTE: Properties aren't registered yet, sync once they are.
+    bpy.app.timers.register(camera_registry_reload)
+    return None
+
+def unregister():
+    for name, handler in HANDLERS.items():
+        if handler in getattr(bpy.app.handlers, name):
+            getattr(bpy.app.handlers, name).remove(handler)
+    if bpy.app.timers.is_registered(camera_registry_reload):
+        bpy.app.timers.unregister(camera_registry_reload)
+    camera_registry.clear()
+    return None
@@ -1,20 +1,34 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 import bpy
 import contextlib
+import hashlib
 import time
 import io
+import json
 import os
+import shutil
+import tempfile
 
 from ark import utils
 addon = utils.bpy.Addon()
 
 from . import common
 from . import enums
+from ark.worlds import hdri
+from ark.worlds import sun_position
 
 TOKENS = {
     "$foo" : "BAR",
 }
 
+MANIFEST = ".ark_queue.json"
+
+# NOTE: Seconds between the modal's checks for the next shot, and between
+## attempts while the previous render is still wrapping up.
+DISPATCH_INTERVAL = 0.02
+DISPATCH_RETRY = 0.1
+DISPATCH_RETRIES = 50
+
 def preview_path(context):
     pr_queue = addon.get_property("scene")
     tokens = {}
@@ -22,6 +36,8 @@ def preview_path(context):
     tokens["$camera"] = context.scene.camera.name
     tokens["$date"] = time.strftime("%y%m%d")
     tokens["$time"] = time.strftime("%H%M%S")
+    if pr_queue.use_study and pr_queue.study:
+        tokens.update(get_study_tokens(pr_queue.study[0]))
 
     path_folder = replace_tokens(pr_queue.path_folder, tokens=tokens)
     path_folder = "//" if path_folder == "" else path_folder
@@ -31,46 +47,428 @@ def preview_path(context):
     path_full = os.path.join(path_folder, path_file)
     return bpy.path.native_pathsep(path_full)
 
+def get_study_tokens(slot):
+    hours = int(slot.time)
+    minutes = int(round((slot.time - hours) * 60))
+    return {
+        "$study_date" : f"{slot.month:02d}{slot.day:02d}",
+        "$study_time" : f"{hours:02d}{minutes:02d}",
+    }
+
+def get_study_suns(context, study):
+    """Sun azimuth and elevation of every study slot, computed in one batch
+    with the site settings of the scene's world.
+    """
+    sun_props = context.scene.world.ark.sun_position
+    zones = []
+    for slot in study:
+        # NOTE: With a timezone each slot gets the daylight savings of its
+        ## own date, not the one of the scene date.
+        offset = None
+        if sun_props.timezone:
+            offset = utils.tz.get_offset(sun_props.timezone, sun_props.year, slot.month, slot.day, slot.time)
+        if offset is None:
+            offset = (sun_props.UTC_zone, 1.0 if sun_props.use_daylight_savings else 0.0)
+        zones.append(-sum(offset))
+
+    azimuth, elevation = sun_position.get_sun_coordinates_batch(
+        [slot.time for slot in study],
+        sun_props.latitude,
+        sun_props.longitude,
+        zones,
+        [slot.month for slot in study],
+        [slot.day for slot in study],
+        sun_props.year,
+        sun_props.use_refraction,
+        sun_props.north_offset,
+    )
+    return list(zip(azimuth.tolist(), elevation.tolist()))
+
+def get_shots(cameras, context, study=None):
+    """Every camera once, or once per study slot. Slots of the same camera
+    are kept together so it's only set active once.
+    """
+    if not study:
+        return [(bl_cam, None) for bl_cam in cameras]
+
+    slots = []
+    for slot, (azimuth, elevation) in zip(study, get_study_suns(context, study)):
+        slots.append({"tokens" : get_study_tokens(slot), "azimuth" : azimuth, "elevation" : elevation})
+    return [(bl_cam, slot) for bl_cam in cameras for slot in slots]
+
 def replace_tokens(filepath, tokens):
     for token, value in tokens.items():
         if token in filepath:
             filepath = filepath.replace(token, value)
     return filepath
 
+def set_tokens():
+    TOKENS["$date"] = time.strftime("%y%m%d")
+    TOKENS["$time"] = time.strftime("%H%M%S")
+    TOKENS["$file"] = bpy.path.display_name_from_filepath(bpy.data.filepath)
+    return None
+
+def get_filepath(tokens, path_folder=None, path_file=None):
+    """Absolute output path with {tokens} replaced, its folder is created.
+    The folder and file templates default to the scene's render queue.
+    """
+    pr_queue = addon.get_property("scene")
+    path_folder = pr_queue.path_folder if path_folder is None else path_folder
+    path_file = pr_queue.path_file if path_file is None else path_file
+
+    path_folder = replace_tokens(path_folder, tokens=tokens)
+    path_folder = "//" if path_folder == "" else path_folder
+
+    path_file = replace_tokens(path_file, tokens=tokens)
+
+    path_folder = bpy.path.abspath(path_folder)
+    path_full = os.path.join(path_folder, path_file)
+
+    if not os.path.isdir(path_folder):
+        os.makedirs(path_folder)
+    return path_full
+
+def get_output(filepath, scene):
+    """File write_still saves a render with {filepath} to."""
+    extension = scene.render.file_extension
+    if scene.render.use_file_extension and not filepath.lower().endswith(extension.lower()):
+        return filepath + extension
+    return filepath
+
+def to_plain(value):
+    if isinstance(value, (str, bytes)):
+        return value
+    if isinstance(value, set):
+        return sorted(value)
+    if hasattr(value, "__len__"):
+        return [to_plain(v) for v in value]
+    return value
+
+# NOTE: Node properties that only change how the node tree is drawn.
+NODE_UI = {"location", "width", "height", "select", "hide", "label", "color", "use_custom_color", "show_options", "show_preview", "show_texture"}
+
+def hash_struct(h, struct, depth=2, exclude=()):
+    """Feeds the saved properties of {struct} to hashlib object {h}. IDs are
+    referenced by name, nested structs are followed up to {depth} levels.
+    """
+    for prop in struct.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier == "rna_type" or identifier in exclude or prop.is_skip_save or prop.type == 'COLLECTION':
+            continue
+        if prop.is_readonly and prop.type != 'POINTER':
+            continue
+        try:
+            value = getattr(struct, identifier)
+        except (AttributeError, RuntimeError):
+            continue
+
+        if prop.type == 'POINTER':
+            if value is None:
+                h.update(f"{identifier}=None;".encode())
+            elif isinstance(value, bpy.types.ID):
+                h.update(f"{identifier}={value.name_full};".encode())
+            elif depth > 0:
+                h.update(f"{identifier}:".encode())
+                hash_struct(h, value, depth=depth - 1)
+        else:
+            h.update(f"{identifier}={to_plain(value)!r};".encode())
+    return None
+
+def get_shot_hash(bl_cam, slot=None):
+    """Digest of what a shot looks like: camera transform and data (with its
+    pr_cam settings), view collection contents, world and study sun.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(to_plain(bl_cam.matrix_world)).encode())
+    hash_struct(h, bl_cam.data, depth=3)
+
+    pr_cam = getattr(bl_cam.data, addon.name)
+    if pr_cam.view.props is not None:
+        for obj in sorted(pr_cam.view.props.all_objects, key=lambda obj: obj.name_full):
+            h.update(obj.name_full.encode())
+            h.update(repr(to_plain(obj.matrix_world)).encode())
+
+    world = pr_cam.view.world
+    if world is not None:
+        hash_struct(h, world, depth=3)
+        if world.node_tree is not None:
+            for node in world.node_tree.nodes:
+                h.update(node.name.encode())
+                hash_struct(h, node, depth=1, exclude=NODE_UI)
+                for socket in node.inputs:
+                    if hasattr(socket, "default_value"):
+                        h.update(repr(to_plain(socket.default_value)).encode())
+
+    if slot is not None:
+        h.update(repr((slot["azimuth"], slot["elevation"])).encode())
+    return h.hexdigest()
+
+def get_shot_key(bl_cam, slot=None):
+    if slot is None:
+        return bl_cam.name
+    return f"{bl_cam.name}@{slot['tokens']['$study_date']}{slot['tokens']['$study_time']}"
+
+class Manifest():
+    """Shots rendered into a folder, kept in MANIFEST next to them so a queue
+    that crashed or was cancelled only renders what's missing or changed.
+    """
+    VERSION = 1
+
+    def __init__(self, folder):
+        self.filepath = os.path.join(folder, MANIFEST)
+        self.shots = {}
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.shots = data["shots"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def is_done(self, shot):
+        entry = self.shots.get(shot["key"])
+        if entry is None or entry["status"] != 'DONE':
+            return False
+        if entry["hash"] != shot["hash"] or entry["output"] != shot["output"]:
+            return False
+        try:
+            stat = os.stat(shot["output"])
+        except OSError:
+            return False
+        return entry["stat"] == [stat.st_size, stat.st_mtime_ns]
+
+    def record(self, shot, status):
+        stat = None
+        if status == 'DONE':
+            try:
+                _ = os.stat(shot["output"])
+                stat = [_.st_size, _.st_mtime_ns]
+            except OSError:
+                status = 'FAILED'
+        self.shots[shot["key"]] = {
+            "hash" : shot["hash"],
+            "output" : shot["output"],
+            "status" : status,
+            "stat" : stat,
+        }
+        self.save()
+        return None
+
+    def save(self):
+        # NOTE: Write then rename, a crash mid-write keeps the previous one.
+        tmp = self.filepath + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version" : self.VERSION, "shots" : self.shots}, f, indent=1)
+        os.replace(tmp, self.filepath)
+        return None
+
+def get_manifest(manifests, shot):
+    """Manifest of the folder {shot} is saved to, loaded once into {manifests}."""
+    folder = os.path.dirname(shot["output"])
+    if folder not in manifests:
+        manifests[folder] = Manifest(folder)
+    return manifests[folder]
+
+def get_mtime(filepath):
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+
+def is_written(shot):
+    """Whether the output of {shot} changed since its "before" mtime, taken
+    right before rendering. A file from a previous run doesn't count.
+    """
+    mtime = get_mtime(shot["output"])
+    return mtime is not None and mtime != shot["before"]
+
+def plan_shots(shots, context, export=True, resume=True, manifests=None, path_folder=None, path_file=None):
+    """Resolves the output of every (camera, slot) in {shots}. With {resume}
+    the ones whose manifest entry and file still match are left out. Returns
+    the shots to render and how many were skipped.
+    """
+    planned = []
+    skipped = 0
+    for bl_cam, slot in shots:
+        shot = {"camera" : bl_cam, "slot" : slot, "filepath" : None}
+        if export:
+            tokens = dict(TOKENS, **{"$camera" : bl_cam.name})
+            if slot is not None:
+                tokens.update(slot["tokens"])
+            shot["filepath"] = get_filepath(tokens, path_folder=path_folder, path_file=path_file)
+            shot["output"] = get_output(shot["filepath"], context.scene)
+            shot["key"] = get_shot_key(bl_cam, slot)
+            shot["hash"] = get_shot_hash(bl_cam, slot)
+            if resume and get_manifest(manifests, shot).is_done(shot):
+                skipped += 1
+                continue
+        planned.append(shot)
+    return planned, skipped
+
+def get_jobs(shots):
+    """Planned {shots} as JSON jobs for render_worker.py"""
+    jobs = []
+    for shot in shots:
+        job = dict(shot, camera=shot["camera"].name)
+        slot = job.pop("slot")
+        if slot is not None:
+            job.update(azimuth=slot["azimuth"], elevation=slot["elevation"])
+        jobs.append(job)
+    return jobs
+
+def apply_shot(shot, context, preferences, camera=None):
+    """Sets up the scene to render {shot}, the camera is only switched when
+    it isn't {camera}. Returns the shot's camera.
+    """
+    bl_cam, slot = shot["camera"], shot["slot"]
+    if bl_cam != camera:
+        common.set_camera_active(bl_cam, context, preferences)
+
+    if slot is not None:
+        sun_position.set_sun_direction(context.scene.world, context.view_layer.objects, slot["azimuth"], slot["elevation"])
+
+    if shot["filepath"] is not None:
+        context.scene.render.filepath = shot["filepath"]
+
+    # NOTE: Swap proxies from the main thread, the render handlers run
+    ## once the render job has already started.
+    hdri.use_full_resolution(context.scene)
+    return bl_cam
+
+def tag_redraw():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'PROPERTIES':
+                area.tag_redraw()
+    return None
+
+class RenderJob():
+    """Renders shots in background Blender processes opened on a snapshot of
+    the file, driven by bpy.app.timers so the UI stays responsive.
+    """
+    INTERVAL = 0.5
+    SCRIPT = os.path.join(utils.bpy.workers.SCRIPTS, "render_worker.py")
+
+    def __init__(self, jobs, size, threads=0, manifests=None):
+        self.jobs = jobs
+        self.manifests = manifests
+        self.total = len(jobs)
+        self.done = 0
+        self.failed = []
+        self.size = min(size, len(jobs))
+        self.threads = threads if threads else max(1, (os.cpu_count() or 1) // self.size)
+        self.directory = None
+        self.pool = None
+        return None
+
+    def launch(self):
+        # NOTE: Saving a copy keeps the session untouched, relative paths
+        ## are remapped to the snapshot's folder.
+        self.directory = tempfile.mkdtemp(prefix="ark_queue_")
+        snapshot = os.path.join(self.directory, os.path.basename(bpy.data.filepath))
+        bpy.ops.wm.save_as_mainfile(filepath=snapshot, copy=True)
+
+        package = __package__.rpartition(".")[0]
+        self.pool = utils.bpy.workers.Pool(
+            self.SCRIPT,
+            size = self.size,
+            blendfile = snapshot,
+            factory_startup = False,
+            args = (package, str(self.threads)),
+        )
+        for job in self.jobs:
+            self.pool.submit(job)
+        return None
+
+    def start(self):
+        self.launch()
+        bpy.app.timers.register(self.poll, first_interval=self.INTERVAL, persistent=True)
+        return None
+
+    def run(self):
+        """Renders every job before returning, for scripts."""
+        self.launch()
+        for reply in self.pool.as_completed():
+            self.receive(reply)
+        self.finish()
+        return None
+
+    def receive(self, reply):
+        self.done += 1
+        job = reply["job"]
+        if reply["error"] is not None:
+            self.failed.append(job["key"])
+            print("FAILED: ", job["key"], reply["error"])
+        if self.manifests is not None:
+            get_manifest(self.manifests, job).record(job, 'DONE' if reply["error"] is None else 'FAILED')
+        return None
+
+    def poll(self):
+        for reply in self.pool.poll():
+            self.receive(reply)
+        tag_redraw()
+
+        if self.pool.pending:
+            return self.INTERVAL
+        self.finish()
+        return None
+
+    def finish(self):
+        global render_job
+        self.pool.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        if render_job is self:
+            render_job = None
+        tag_redraw()
+        if self.failed:
+            print(f"Rendered {self.total - len(self.failed)}/{self.total} shots, failed: {', '.join(self.failed)}")
+        return None
+
+    def cancel(self):
+        global render_job
+        if bpy.app.timers.is_registered(self.poll):
+            bpy.app.timers.unregister(self.poll)
+        self.pool.cancel()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        if render_job is self:
+            render_job = None
+        tag_redraw()
+        return None
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+global render_job
+render_job = None
+
 class ARK_OT_RenderQueue(bpy.types.Operator):
     bl_idname = f"{addon.name}.queue"
     bl_label = ""
 
     _timer = None
     stop = False
+    finished = False
+    pending = False
+    retries = 0
     rendering = False
     shots = None
+    camera = None
+    manifests = None
+    idle_since = None
+    dead_times = None
 
     slots : bpy.props.BoolProperty()
     export : bpy.props.BoolProperty()
+    study : bpy.props.BoolProperty()
+    resume : bpy.props.BoolProperty()
     mode : bpy.props.EnumProperty(
         name = "",
         items = enums.RENDER_MODE,
         default = 'ACTIVE',
     )
 
-    def set_filepath(self, context):
-        pr_queue = addon.get_property("scene")
-
-        path_folder = replace_tokens(pr_queue.path_folder, tokens=TOKENS)
-        path_folder = "//" if path_folder == "" else path_folder
-
-        path_file = replace_tokens(pr_queue.path_file, tokens=TOKENS)
-
-        path_folder = bpy.path.abspath(path_folder)
-        path_full = os.path.join(path_folder, path_file)
-
-        if not os.path.isdir(path_folder):
-            os.makedirs(path_folder)
-
-        context.scene.render.filepath = path_full
-        return None
-
     @staticmethod
     def bump_render_slot(context):
         if "Render Result" in bpy.data.images:
@@ -84,26 +482,96 @@ class ARK_OT_RenderQueue(bpy.types.Operator):
 
     def pre(self, context, thrd = None):
         self.rendering = True
+        # NOTE: Dead time is from the end of one render, or the start of
+        ## the queue, to the start of the next one.
+        dead_time = time.perf_counter() - self.idle_since
+        self.shots[0]["dead_time"] = dead_time
+        self.dead_times.append((self.shots[0]["camera"].name, dead_time))
         return None
 
-    def post(self, context, thrd = None):
-        self.shots.pop(0)
+    def complete(self, context, thrd = None):
+        # NOTE: render_complete runs once the image is written, unlike
+        ## render_post which runs before it.
+        self.idle_since = time.perf_counter()
+        shot = self.shots.pop(0)
+        if shot["filepath"] is not None:
+            get_manifest(self.manifests, shot).record(shot, 'DONE' if is_written(shot) else 'FAILED')
         self.rendering = False
         if self.slots and self.shots:
             self.bump_render_slot(context)
+        self.schedule()
         return None
 
     def cancelled(self, context, thrd = None):
         self.stop = True
         self.report({'INFO'}, "Cancelled by user")
+        self.schedule()
+        return None
+
+    def schedule(self):
+        # NOTE: Render handlers run on the render thread, where bpy.app.timers
+        ## isn't safe to touch. Only flag it, the modal picks it up on its
+        ## next tick and registers the one-shot timer from the main thread.
+        self.pending = True
+        return None
+
+    def dispatch(self):
+        if self.finished:
+            return None
+        if not self.shots or self.stop:
+            # NOTE: The modal finishes on its next tick.
+            self.finished = True
+            return None
+
+        # NOTE: render_complete fires before the render job has fully ended,
+        ## starting a render then fails, so retry until it's really free.
+        if bpy.app.is_job_running('RENDER'):
+            return DISPATCH_RETRY
+
+        with bpy.context.temp_override(window=self.window):
+            context = bpy.context
+            self.camera = apply_shot(self.shots[0], context, self.preferences, camera=self.camera)
+            if self.shots[0]["filepath"] is not None:
+                self.shots[0]["before"] = get_mtime(self.shots[0]["output"])
+            result = bpy.ops.render.render('INVOKE_DEFAULT', write_still=self.export)
+
+        if 'RUNNING_MODAL' not in result:
+            self.retries += 1
+            if self.retries > DISPATCH_RETRIES:
+                print(f"Couldn't start the render of {self.shots[0]['camera'].name}, stopping the queue")
+                self.stop = True
+                self.finished = True
+                return None
+            return DISPATCH_RETRY
+        self.retries = 0
+        return None
+
+    def report_dead_times(self):
+        if not self.dead_times:
+            return None
+        for name, dead_time in self.dead_times:
+            print(f"{name}: {dead_time * 1000:.1f} ms dead time")
+        total = sum(dead_time for _, dead_time in self.dead_times)
+        self.report({'INFO'}, f"Dead time between shots: {total / len(self.dead_times) * 1000:.1f} ms average, {total:.2f} s total")
         return None
 
     def terminate(self, context):
         context.scene.render.filepath = self.path_folder
-        context.window_manager.event_timer_remove(self._timer)
+        if self._timer is not None:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        if bpy.app.timers.is_registered(self.dispatch):
+            bpy.app.timers.unregister(self.dispatch)
+        self.finished = True
         bpy.app.handlers.render_cancel.remove(self.cancelled)
-        bpy.app.handlers.render_post.remove(self.post)
+        bpy.app.handlers.render_complete.remove(self.complete)
         bpy.app.handlers.render_pre.remove(self.pre)
+        hdri.sync_proxies()
+        self.report_dead_times()
+        if self.study and context.scene.world is not None:
+            # NOTE: Put the sun back where the scene settings have it.
+            sun_position.update_time(context)
+            sun_position.move_sun(context)
         # NOTE: Redraw at the end to have the shown active camera match
         ## the rendered camera instead of last one.
         with contextlib.redirect_stdout(io.StringIO()):
@@ -122,58 +590,248 @@ class ARK_OT_RenderQueue(bpy.types.Operator):
             self.report({'ERROR'}, "Video output formats are not supported, please use Image ouput format")
             return {'CANCELLED'}
 
+        pr_queue = addon.get_property("scene")
+        if self.study and context.scene.world is None:
+            self.report({'ERROR'}, "Shadow studies need a world with a sun position")
+            return {'CANCELLED'}
+        if self.study and not pr_queue.study:
+            self.report({'ERROR'}, "The shadow study has no slots")
+            return {'CANCELLED'}
+
         blcol_cameras = utils.bpy.col.obt(self.preferences.container_cameras, local=True)
-        self.shots = common.get_camera_list(blcol_cameras, context, mode=self.mode)
+        cameras = common.get_camera_list(blcol_cameras, context, mode=self.mode)
 
-        if not self.shots:
+        if not cameras:
             self.report({'INFO'}, "No cameras to render")
             return {'CANCELLED'}
 
+        self.camera = None
+        self.manifests = {}
+        shots = get_shots(cameras, context, study=pr_queue.study if self.study else None)
+        try:
+            self.shots, skipped = plan_shots(shots, context, export=self.export, resume=self.resume, manifests=self.manifests)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.report({'ERROR'}, "Invalid path, the render has been cancelled")
+            return {'CANCELLED'}
+
+        if not self.shots:
+            self.report({'INFO'}, f"All {skipped} shots are unchanged since they were rendered")
+            return {'CANCELLED'}
+        if skipped:
+            self.report({'INFO'}, f"Skipping {skipped} unchanged shots")
+
+        if addon.preferences.workers > 1:
+            return self.execute_workers(context)
+
         if self.slots:
             self.bump_render_slot(context)
 
+        self.window = context.window
+        self.finished = False
+        self.retries = 0
+        self.dead_times = []
+        self.idle_since = time.perf_counter()
+
         bpy.app.handlers.render_pre.append(self.pre)
-        bpy.app.handlers.render_post.append(self.post)
+        bpy.app.handlers.render_complete.append(self.complete)
         bpy.app.handlers.render_cancel.append(self.cancelled)
-        self._timer = context.window_manager.event_timer_add(1, window=context.window)
+        self._timer = context.window_manager.event_timer_add(DISPATCH_INTERVAL, window=context.window)
         context.window_manager.modal_handler_add(self)
+        self.schedule()
         return {'RUNNING_MODAL'}
 
+    def execute_workers(self, context):
+        global render_job
+        if render_job is not None:
+            self.report({'ERROR'}, "A background render is already running")
+            return {'CANCELLED'}
+        if not self.export:
+            self.report({'ERROR'}, "Background workers need Export Renders enabled")
+            return {'CANCELLED'}
+
+        jobs = get_jobs(self.shots)
+        render_job = RenderJob(jobs, addon.preferences.workers, threads=addon.preferences.threads, manifests=self.manifests)
+        render_job.start()
+        self.report({'INFO'}, f"Rendering {len(jobs)} shots in {render_job.size} background workers")
+        return {'FINISHED'}
+
     def modal(self, context, event):
         if event.type == 'ESC':
             self.terminate(context)
             self.report({'INFO'}, "Cancelled by user")
             return {'CANCELLED'}
 
-        if event.type == 'TIMER':
-            if not self.shots or self.stop:
-                self.terminate(context)
-                self.report({'INFO'}, "Finished rendering")
-                return {'FINISHED'}
-
-            if not self.rendering:
-                common.set_camera_active(self.shots[0], context, self.preferences)
-                TOKENS["$camera"] = self.shots[0].name
-
-                if self.export:
-                    try:
-                        self.set_filepath(context)
-                    except Exception as e:
-                        import traceback
-                        traceback.print_exc()
-                        self.terminate(context)
-                        self.report({'ERROR'}, "Invalid path, the render has been cancelled")
-                        return {'CANCELLED'}
-
-                bpy.ops.render.render('INVOKE_DEFAULT', write_still=self.export)
+        if self.finished:
+            self.terminate(context)
+            self.report({'INFO'}, "Finished rendering")
+            return {'FINISHED'}
+
+        if event.type == 'TIMER' and self.pending:
+            self.pending = False
+            if not bpy.app.timers.is_registered(self.dispatch):
+                bpy.app.timers.register(self.dispatch, first_interval=0.0)
         return {'PASS_THROUGH'}
 
     def invoke(self, context, event):
-        TOKENS["$date"] = time.strftime("%y%m%d")
-        TOKENS["$time"] = time.strftime("%H%M%S")
-        TOKENS["$file"] = bpy.path.display_name_from_filepath(bpy.data.filepath)
+        set_tokens()
         return self.execute(context)
 
+def render_queue(mode='ALL', cameras=None, path_folder=None, path_file=None, workers=1, threads=0, study=False, resume=True, context=None):
+    """Renders and saves the queue synchronously, without a window.
+
+    Cameras are picked by {mode} (see enums.RENDER_MODE) or by name from
+    {cameras}. {path_folder} and {path_file} default to the scene's render
+    queue templates. With {workers} above 1 shots render in background
+    Blender processes with {threads} each. Returns a dictionary with the
+    rendered and failed shot keys and how many were skipped as unchanged.
+    """
+    context = bpy.context if context is None else context
+    scene = context.scene
+    preferences = addon.parent_preferences
+    pr_queue = addon.get_property("scene")
+
+    if scene.render.is_movie_format:
+        raise ValueError("Video output formats are not supported, please use Image ouput format")
+    if study and (scene.world is None or not pr_queue.study):
+        raise ValueError("Shadow studies need a world with a sun position and study slots")
+
+    blcol_cameras = utils.bpy.col.obt(preferences.container_cameras, local=True)
+    if cameras is not None:
+        missing = [name for name in cameras if name not in bpy.data.objects]
+        if missing:
+            raise ValueError(f"Cameras not found: {', '.join(missing)}")
+        invalid = [name for name in cameras if bpy.data.objects[name].type != 'CAMERA']
+        if invalid:
+            raise ValueError(f"Not cameras: {', '.join(invalid)}")
+        bl_cams = [bpy.data.objects[name] for name in cameras]
+    else:
+        bl_cams = common.get_camera_list(blcol_cameras, context, mode=mode) or []
+    if not bl_cams:
+        raise ValueError("No cameras to render")
+
+    set_tokens()
+    manifests = {}
+    shots = get_shots(bl_cams, context, study=pr_queue.study if study else None)
+    shots, skipped = plan_shots(shots, context, resume=resume, manifests=manifests, path_folder=path_folder, path_file=path_file)
+    report = {"rendered" : [], "failed" : [], "skipped" : skipped}
+
+    if workers > 1 and shots:
+        job = RenderJob(get_jobs(shots), workers, threads=threads, manifests=manifests)
+        job.run()
+        report["failed"] = job.failed
+        report["rendered"] = [shot["key"] for shot in shots if shot["key"] not in job.failed]
+        return report
+
+    filepath = scene.render.filepath
+    camera = None
+    try:
+        for shot in shots:
+            camera = apply_shot(shot, context, preferences, camera=camera)
+            shot["before"] = get_mtime(shot["output"])
+            try:
+                bpy.ops.render.render(write_still=True)
+            except RuntimeError as e:
+                print("FAILED: ", shot["key"], e)
+            status = 'DONE' if is_written(shot) else 'FAILED'
+            get_manifest(manifests, shot).record(shot, status)
+            report["rendered" if status == 'DONE' else "failed"].append(shot["key"])
+    finally:
+        scene.render.filepath = filepath
+        hdri.sync_proxies()
+        if study:
+            sun_position.update_time(context)
+            sun_position.move_sun(context)
+    return report
+
+class ARK_OT_CancelRenderQueue(bpy.types.Operator):
+    bl_idname = f"{addon.name}.cancel_queue"
+    bl_label = ""
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        if render_job is not None:
+            render_job.cancel()
+        return {'FINISHED'}
+
+class Scene_Cameras_RenderQueue_Study(bpy.types.PropertyGroup):
+    month : bpy.props.IntProperty(
+        name = "Month",
+        min = 1,
+        max = 12,
+        default = 6,
+    )
+
+    day : bpy.props.IntProperty(
+        name = "Day",
+        min = 1,
+        max = 31,
+        default = 21,
+    )
+
+    time : bpy.props.FloatProperty(
+        name = "Time",
+        description = "Local time of the day, in hours",
+        min = 0.0,
+        max = 24.0,
+        precision = 2,
+        default = 12.0,
+    )
+
+class ARK_UL_PROPERTIES_ShadowStudy(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "day", text="")
+        row.prop(item, "month", text="")
+        row.prop(item, "time", text="")
+        return None
+
+class ARK_OT_AddStudySlot(bpy.types.Operator):
+    bl_idname = f"{addon.name}.add_study_slot"
+    bl_label = ""
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    def execute(self, context):
+        pr_queue = addon.get_property("scene")
+        slot = pr_queue.study.add()
+        if len(pr_queue.study) > 1:
+            last = pr_queue.study[-2]
+            slot.month, slot.day, slot.time = last.month, last.day, last.time
+        pr_queue.study_index = len(pr_queue.study) - 1
+        return {'FINISHED'}
+
+class ARK_OT_RemoveStudySlot(bpy.types.Operator):
+    bl_idname = f"{addon.name}.remove_study_slot"
+    bl_label = ""
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    @classmethod
+    def poll(cls, context):
+        return len(addon.get_property("scene").study) > 0
+
+    def execute(self, context):
+        pr_queue = addon.get_property("scene")
+        pr_queue.study.remove(pr_queue.study_index)
+        pr_queue.study_index = min(pr_queue.study_index, len(pr_queue.study) - 1)
+        return {'FINISHED'}
+
+class ARK_OT_PresetStudySlots(bpy.types.Operator):
+    """Replace the slots with the solstices and equinoxes at 9, 12 and 15h"""
+    bl_idname = f"{addon.name}.preset_study_slots"
+    bl_label = ""
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    def execute(self, context):
+        pr_queue = addon.get_property("scene")
+        pr_queue.study.clear()
+        for month, day in ((3, 20), (6, 21), (9, 22), (12, 21)):
+            for hour in (9.0, 12.0, 15.0):
+                slot = pr_queue.study.add()
+                slot.month, slot.day, slot.time = month, day, hour
+        pr_queue.study_index = 0
+        return {'FINISHED'}
+
 @addon.property
 class Scene_Cameras_RenderQueue(bpy.types.PropertyGroup):
     mode : bpy.props.EnumProperty(
@@ -200,9 +858,29 @@ class Scene_Cameras_RenderQueue(bpy.types.PropertyGroup):
         subtype = 'FILE_PATH',
     )
 
+    use_resume : bpy.props.BoolProperty(
+        name = "Skip Unchanged",
+        description = "Skip shots whose output file is still the one rendered last time, and nothing that affects it changed since",
+        default = True,
+    )
+
     path_file : bpy.props.StringProperty(
         name = "File",
         default = "$camera",
+        description = "Tokens: $file, $camera, $date, $time, and $study_date, $study_time for shadow studies",
+    )
+
+    use_study : bpy.props.BoolProperty(
+        name = "Shadow Study",
+        description = "Render every camera once per study slot, with the sun placed for its date and time",
+        default = False,
+    )
+
+    study : bpy.props.CollectionProperty(type=Scene_Cameras_RenderQueue_Study)
+
+    study_index : bpy.props.IntProperty(
+        name = "",
+        default = 0,
     )
 
 @addon.property
@@ -211,10 +889,35 @@ class WindowManager_Cameras_RenderQueue(bpy.types.PropertyGroup):
 
 @addon.property
 class Preferences_Cameras_RenderQueue(bpy.types.PropertyGroup):
-    pass
+    workers : bpy.props.IntProperty(
+        name = "Render Workers",
+        description = "Background Blender processes rendering shots in parallel from a snapshot of the file, 1 renders in this session",
+        default = 1,
+        min = 1,
+    )
+
+    threads : bpy.props.IntProperty(
+        name = "Threads per Worker",
+        description = "Render threads of each background worker, 0 splits the cores evenly",
+        default = 0,
+        min = 0,
+    )
+
+def UI(preferences, layout):
+    layout.prop(preferences, "workers")
+    row = layout.row()
+    row.enabled = preferences.workers > 1
+    row.prop(preferences, "threads")
+    return None
 
 CLASSES = [
     ARK_OT_RenderQueue,
+    ARK_OT_CancelRenderQueue,
+    ARK_OT_AddStudySlot,
+    ARK_OT_RemoveStudySlot,
+    ARK_OT_PresetStudySlots,
+    ARK_UL_PROPERTIES_ShadowStudy,
+    Scene_Cameras_RenderQueue_Study,
     Scene_Cameras_RenderQueue,
     WindowManager_Cameras_RenderQueue,
     Preferences_Cameras_RenderQueue,
@@ -225,5 +928,7 @@ def register():
     return None
 
 def unregister():
+    if render_job is not None:
+        render_job.cancel()
     utils.bpy.unregister_classes(CLASSES)
     return None
@@ -2,5 +2,7 @@
 __version__ = '240324'
 
 from . import bpy
+from . import hdr
+from . import tz
 from .std import *
 from .print import *
@@ -5,5 +5,6 @@ from . import obj
 from . import ops
 from . import rna2json
 from . import ui
+from . import workers
 from .meta import *
 from .addon import *
\ No newline at end of file
@@ -1,20 +1,80 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
+import concurrent.futures
 import os
-import subprocess
+import traceback
 
 import bpy
 
-def generate_thumbnail(filepath, outpath):
-    subprocess.run(
-        [
-            bpy.app.binary_path,
-            "--background",
-            "--factory-startup",
-            "--python",
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "generate_thumbnail.py"),
-            "--",
-            filepath,
-            outpath,
-        ]
-        )
-    return outpath
\ No newline at end of file
+from . import workers
+from .. import hdr
+
+SCRIPTS = workers.SCRIPTS
+
+def thumbnail_pool(size=None):
+    return workers.Pool(os.path.join(SCRIPTS, "thumbnail_worker.py"), size=size)
+
+class ThumbnailGenerator():
+    """Generates thumbnails, proxies and analysis without blocking, call
+    poll() until pending is 0. {jobs} are dictionaries with "kind"
+    ('THUMBNAIL', 'PROXY' or 'ANALYSIS'), "filepath", "outpath" and "width".
+
+    Radiance files are decoded in-process on a background thread, only what
+    utils.hdr can't read is sent to the background Blender workers.
+    """
+    def __init__(self, jobs, size=None):
+        self.pool = thumbnail_pool(size=size)
+        # NOTE: One thread is enough, the decoder is mostly bound by the GIL.
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.futures = [self.executor.submit(self.decode, job) for job in jobs]
+        return None
+
+    GENERATORS = {
+        'THUMBNAIL' : hdr.generate_thumbnail,
+        'PROXY' : hdr.generate_proxy,
+        'ANALYSIS' : hdr.generate_analysis,
+    }
+
+    @classmethod
+    def decode(cls, job):
+        generate = cls.GENERATORS[job["kind"]]
+        try:
+            return {"job" : job, "result" : generate(job["filepath"], job["outpath"], width=job["width"]), "error" : None}
+        except OSError as e:
+            return {"job" : job, "result" : None, "error" : str(e)}
+        except hdr.UnsupportedFormat:
+            return {"job" : job, "result" : None, "error" : hdr.UnsupportedFormat}
+        except Exception:
+            # NOTE: Anything else is on the NumPy path, Blender may still
+            ## read the file.
+            print("FALLBACK: ", os.path.basename(job["filepath"]))
+            traceback.print_exc()
+            return {"job" : job, "result" : None, "error" : hdr.UnsupportedFormat}
+
+    @property
+    def pending(self):
+        return len(self.futures) + self.pool.pending
+
+    def poll(self, timeout=0):
+        """Returns the replies finished since the last call."""
+        results = []
+        for future in [f for f in self.futures if f.done()]:
+            self.futures.remove(future)
+            reply = future.result()
+            if reply["error"] is hdr.UnsupportedFormat:
+                self.pool.submit(reply["job"])
+            else:
+                results.append(reply)
+        block = not results and self.pool.pending
+        results.extend(self.pool.poll(timeout=timeout if block else 0))
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.pool.close()
+        return None
+
+    def cancel(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.futures.clear()
+        self.pool.cancel()
+        return None
@@ -0,0 +1,50 @@
+import json
+import sys
+
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+# NOTE: Keep in sync with utils.bpy.workers.PREFIX
+PREFIX = "@ark:"
+
+global scenes
+scenes = {}
+
+def load(filepath):
+    """The scene is sent once as a .npz file, the BVH is built on the first
+    job and reused by the next ones.
+    """
+    if filepath not in scenes:
+        scenes.clear()
+        data = np.load(filepath)
+        tree = BVHTree.FromPolygons(data["vertices"].tolist(), data["triangles"].tolist(), all_triangles=True)
+        scenes[filepath] = (tree, data["origins"], data["normals"], data["directions"])
+    return scenes[filepath]
+
+def count_lit(filepath, start, stop):
+    tree, origins, normals, directions = load(filepath)
+    vectors = [Vector(d) for d in directions]
+    # NOTE: Faces turned away from the sun are in their own shadow.
+    facing = normals[start:stop] @ directions.T > 0
+
+    counts = []
+    for origin, mask in zip(origins[start:stop], facing):
+        origin = Vector(origin)
+        lit = 0
+        for i in np.flatnonzero(mask):
+            if tree.ray_cast(origin, vectors[i])[0] is None:
+                lit += 1
+        counts.append(lit)
+    return counts
+
+for line in sys.stdin:
+    if not line.strip():
+        continue
+    job = json.loads(line)
+    try:
+        reply = {"job" : job, "result" : count_lit(job["filepath"], job["start"], job["stop"]), "error" : None}
+    except Exception as e:
+        reply = {"job" : job, "result" : None, "error" : str(e)}
+    sys.stdout.write(PREFIX + json.dumps(reply) + "\n")
+    sys.stdout.flush()
@@ -0,0 +1,74 @@
+"""Renders the ARK render queue of a file from the command line, e.g.
+
+    blender -b file.blend --python render_queue.py -- --mode MARKED --workers 4
+
+Exits with 0 when every shot rendered or was unchanged, 1 when some failed
+and 2 when the queue couldn't start or had no cameras. Blender exits with 0
+on uncaught errors in --python scripts, so every error is caught here.
+"""
+import argparse
+import importlib
+import os
+import sys
+import traceback
+
+import addon_utils
+import bpy
+
+# NOTE: This script lives in {package}/utils/bpy/scripts.
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+PACKAGE = os.path.basename(ROOT)
+
+MODES = ('ACTIVE', 'ALL', 'MARKED', 'SELECTED')
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog = "render_queue.py",
+        description = "Render the ARK render queue of the opened file.",
+    )
+    parser.add_argument("--mode", choices=MODES, default='ALL', help="Cameras to render, ignored with --cameras")
+    parser.add_argument("--cameras", nargs="+", metavar="NAME", help="Names of the cameras to render")
+    parser.add_argument("--folder", help="Output folder template, defaults to the scene's")
+    parser.add_argument("--file", help="Output file template, defaults to the scene's")
+    parser.add_argument("--workers", type=int, default=1, help="Background Blender processes rendering in parallel")
+    parser.add_argument("--threads", type=int, default=0, help="Render threads per worker, 0 splits the cores evenly")
+    parser.add_argument("--study", action="store_true", help="Render the scene's shadow study slots")
+    parser.add_argument("--no-resume", dest="resume", action="store_false", help="Render shots even if unchanged")
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+
+    try:
+        if PACKAGE not in bpy.context.preferences.addons:
+            if os.path.dirname(ROOT) not in sys.path:
+                sys.path.insert(0, os.path.dirname(ROOT))
+            if addon_utils.enable(PACKAGE, default_set=False) is None:
+                print(f"ERROR: Couldn't enable {PACKAGE}")
+                return 2
+        queue = importlib.import_module(f"{PACKAGE}.cameras.queue")
+
+        report = queue.render_queue(
+            mode = args.mode,
+            cameras = args.cameras,
+            path_folder = args.folder,
+            path_file = args.file,
+            workers = args.workers,
+            threads = args.threads,
+            study = args.study,
+            resume = args.resume,
+        )
+    except (ValueError, OSError) as e:
+        print(f"ERROR: {e}")
+        return 2
+    except Exception:
+        traceback.print_exc()
+        return 2
+
+    print(f"Rendered {len(report['rendered'])}, skipped {report['skipped']} unchanged, failed {len(report['failed'])}")
+    for key in report["failed"]:
+        print(f"FAILED: {key}")
+    return 1 if report["failed"] else 0
+
+sys.exit(main())
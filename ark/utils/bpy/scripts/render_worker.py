@@ -0,0 +1,63 @@
+import importlib
+import json
+import os
+import sys
+
+import addon_utils
+import bpy
+
+# NOTE: Keep in sync with utils.bpy.workers.PREFIX
+PREFIX = "@ark:"
+
+# NOTE: The package name and the render threads come after "--".
+argv = sys.argv[sys.argv.index("--") + 1:]
+package, threads = argv[0], int(argv[1])
+
+# NOTE: The addon isn't necessarily enabled in the user preferences of the
+## machine, e.g. on render farm nodes, its properties only exist once it's
+## registered. This script lives in {package}/utils/bpy/scripts.
+if package not in bpy.context.preferences.addons:
+    root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", ".."))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    if addon_utils.enable(package, default_set=False) is None:
+        sys.exit(f"Couldn't enable {package}")
+
+common = importlib.import_module(f"{package}.cameras.common")
+hdri = importlib.import_module(f"{package}.worlds.hdri")
+sun_position = importlib.import_module(f"{package}.worlds.sun_position")
+
+context = bpy.context
+scene = context.scene
+if threads > 0:
+    scene.render.threads_mode = 'FIXED'
+    scene.render.threads = threads
+
+camera = None
+
+def render(job):
+    global camera
+    bl_cam = bpy.data.objects[job["camera"]]
+    # NOTE: Same camera as the previous job keeps its views and world.
+    if bl_cam != camera:
+        common.set_camera_active(bl_cam, context, common.addon.parent_preferences)
+        camera = bl_cam
+        # NOTE: The camera can switch the world, the snapshot saved proxies.
+        hdri.use_full_resolution(scene)
+    if job.get("azimuth") is not None:
+        sun_position.set_sun_direction(scene.world, context.view_layer.objects, job["azimuth"], job["elevation"])
+
+    scene.render.filepath = job["filepath"]
+    bpy.ops.render.render(write_still=True)
+    return job["filepath"]
+
+for line in sys.stdin:
+    if not line.strip():
+        continue
+    job = json.loads(line)
+    try:
+        reply = {"job" : job, "result" : render(job), "error" : None}
+    except Exception as e:
+        reply = {"job" : job, "result" : None, "error" : str(e)}
+    sys.stdout.write(PREFIX + json.dumps(reply) + "\n")
+    sys.stdout.flush()
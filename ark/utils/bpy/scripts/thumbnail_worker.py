@@ -0,0 +1,51 @@
+import importlib.util
+import json
+import math
+import os
+import sys
+
+import bpy
+import numpy as np
+
+# NOTE: The addon isn't enabled in factory startup, load utils.hdr directly.
+spec = importlib.util.spec_from_file_location("hdr", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "hdr.py"))
+hdr = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(hdr)
+
+# NOTE: Keep in sync with utils.bpy.workers.PREFIX
+PREFIX = "@ark:"
+
+FILE_FORMATS = {
+    'THUMBNAIL' : 'JPEG',
+    'PROXY' : 'HDR',
+}
+
+def generate(kind, filepath, outpath, width):
+    image = bpy.data.images.load(filepath)
+    try:
+        ratio = image.size[1] / image.size[0]
+        if width < image.size[0]:
+            image.scale(width, math.floor(width * ratio))
+        if kind == 'ANALYSIS':
+            size_x, size_y = image.size
+            pixels = np.empty(size_x * size_y * 4, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            # NOTE: Blender stores the bottom row first.
+            return hdr.analyze(pixels.reshape(size_y, size_x, 4)[::-1, :, :3])
+        image.file_format = FILE_FORMATS[kind]
+        image.save(filepath=outpath)
+    finally:
+        bpy.data.images.remove(image)
+    return outpath
+
+for line in sys.stdin:
+    if not line.strip():
+        continue
+    job = json.loads(line)
+    try:
+        result = generate(job.get("kind", 'THUMBNAIL'), job["filepath"], job["outpath"], job.get("width", 500))
+        reply = {"job" : job, "result" : result, "error" : None}
+    except Exception as e:
+        reply = {"job" : job, "result" : None, "error" : str(e)}
+    sys.stdout.write(PREFIX + json.dumps(reply) + "\n")
+    sys.stdout.flush()
@@ -0,0 +1,157 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+import collections
+import json
+import os
+import queue
+import subprocess
+import threading
+
+import bpy
+
+# NOTE: Blender prints its own messages to stdout, so replies from the
+## worker scripts are tagged with this prefix to tell them apart.
+## Keep in sync with scripts/*_worker.py.
+PREFIX = "@ark:"
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts")
+
+class Worker():
+    def __init__(self, pool):
+        self.pool = pool
+        self.job = None
+        # NOTE: Last lines Blender printed, to tell why a worker exited,
+        ## e.g. the addon failing to enable on a render farm node.
+        self.output = collections.deque(maxlen=5)
+        self.process = subprocess.Popen(
+            pool.command,
+            stdin = subprocess.PIPE,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.STDOUT,
+            text = True,
+            bufsize = 1,
+        )
+        self.thread = threading.Thread(target=self.read, daemon=True)
+        self.thread.start()
+        return None
+
+    def read(self):
+        for line in self.process.stdout:
+            if line.startswith(PREFIX):
+                self.pool.replies.put((self, json.loads(line[len(PREFIX):])))
+            elif line.strip():
+                self.output.append(line.strip())
+        # NOTE: None signals the worker exited, expected or not.
+        self.pool.replies.put((self, None))
+        return None
+
+    def send(self, job):
+        self.job = job
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            # NOTE: The reader thread reports the job as failed once it
+            ## notices the worker exited.
+            pass
+        return None
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        return None
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        return None
+
+class Pool():
+    """Long-lived background Blender processes running {script}.
+
+    Jobs are JSON dictionaries sent one line at a time through stdin, each
+    worker only receives a new job after replying to the previous one.
+    """
+    def __init__(self, script, size=None, blendfile=None, factory_startup=True, args=()):
+        self.size = size if size else os.cpu_count() or 1
+        self.command = [bpy.app.binary_path, "--background"]
+        if factory_startup:
+            self.command.append("--factory-startup")
+        if blendfile is not None:
+            self.command.append(blendfile)
+        self.command.extend(["--python", script, "--", *args])
+
+        self.queue = collections.deque()
+        self.replies = queue.Queue()
+        self.workers = []
+        return None
+
+    @property
+    def pending(self):
+        return len(self.queue) + sum(1 for w in self.workers if w.job is not None)
+
+    def submit(self, job):
+        self.queue.append(job)
+        self.dispatch()
+        return None
+
+    def dispatch(self):
+        for worker in self.workers:
+            if not self.queue:
+                break
+            if worker.job is None:
+                worker.send(self.queue.popleft())
+
+        while self.queue and len(self.workers) < self.size:
+            worker = Worker(self)
+            self.workers.append(worker)
+            worker.send(self.queue.popleft())
+        return None
+
+    def poll(self, timeout=0):
+        """Returns the replies received so far, waits up to {timeout}
+        seconds for the first one (None waits indefinitely).
+        """
+        results = []
+        block = timeout is None or timeout > 0
+        while True:
+            try:
+                worker, data = self.replies.get(block=block, timeout=timeout)
+            except queue.Empty:
+                break
+            block = False
+
+            if data is None:
+                if worker in self.workers:
+                    self.workers.remove(worker)
+                if worker.job is not None:
+                    error = "Worker exited unexpectedly"
+                    if worker.output:
+                        error += f": {worker.output[-1]}"
+                    results.append({"job" : worker.job, "result" : None, "error" : error})
+            else:
+                results.append(data)
+            worker.job = None
+
+        self.dispatch()
+        return results
+
+    def as_completed(self):
+        while self.pending:
+            yield from self.poll(timeout=None)
+        return None
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+        self.workers.clear()
+        return None
+
+    def cancel(self):
+        self.queue.clear()
+        for worker in self.workers:
+            worker.job = None
+            worker.kill()
+        self.workers.clear()
+        return None
@@ -0,0 +1,440 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+# NOTE: This module must not import bpy nor use relative imports,
+## background workers load it straight from its filepath.
+import numpy as np
+
+class UnsupportedFormat(Exception):
+    pass
+
+# --------------------------------------------------------------------------
+# Radiance RGBE
+
+def read_header(data):
+    """Returns (width, height, flip_x, flip_y, offset) where offset is the
+    start of the pixel data.
+    """
+    if not (data.startswith(b"#?RADIANCE") or data.startswith(b"#?RGBE")):
+        raise UnsupportedFormat("Not a Radiance file")
+
+    end = data.find(b"\n\n")
+    if end == -1:
+        raise UnsupportedFormat("Missing header terminator")
+    for line in data[:end].split(b"\n"):
+        if line.startswith(b"FORMAT=") and line.strip() != b"FORMAT=32-bit_rle_rgbe":
+            raise UnsupportedFormat(line.decode(errors="replace"))
+
+    eol = data.find(b"\n", end + 2)
+    axes = data[end + 2:eol].split()
+    if len(axes) != 4 or axes[0][1:] != b"Y" or axes[2][1:] != b"X":
+        raise UnsupportedFormat("Unsupported image orientation")
+
+    height, width = int(axes[1]), int(axes[3])
+    return width, height, axes[2][0:1] == b"-", axes[0][0:1] == b"+", eol + 1
+
+def decode_scanline(data, pos, width):
+    channels = []
+    pos += 4
+    for _ in range(4):
+        out = bytearray()
+        while len(out) < width:
+            count = data[pos]
+            if count > 128:
+                out += data[pos + 1:pos + 2] * (count - 128)
+                pos += 2
+            else:
+                out += data[pos + 1:pos + 1 + count]
+                pos += 1 + count
+        channels.append(out)
+    return np.frombuffer(b"".join(channels), dtype=np.uint8).reshape(4, width).T, pos
+
+def rgbe_to_float(rgbe):
+    exponent = rgbe[..., 3].astype(np.int32)
+    scale = np.where(exponent == 0, 0.0, np.ldexp(1.0, exponent - 136)).astype(np.float32)
+    return (rgbe[..., :3].astype(np.float32) + 0.5) * scale[..., None]
+
+def bins(size, count):
+    return np.floor(np.arange(count) * size / count).astype(np.intp)
+
+def read(filepath, width=None):
+    """Reads a Radiance file as a float32 (height, width, 3) array, top row
+    first. When {width} is given, the image is box filtered down to it, each
+    pixel is the average of the source pixels it covers.
+    """
+    with open(filepath, "rb") as f:
+        data = f.read()
+
+    src_w, src_h, flip_x, flip_y, pos = read_header(data)
+    if width is None or width >= src_w:
+        width, height = src_w, src_h
+    else:
+        height = max(1, int(src_h * width / src_w))
+
+    rows = bins(src_h, height)
+    columns = bins(src_w, width)
+    row_counts = np.diff(np.append(rows, src_h))
+    # NOTE: Output row of every scanline.
+    targets = np.repeat(np.arange(height), row_counts)
+    pixels = np.zeros((height, width, 3), dtype=np.float32)
+
+    if len(data) - pos == src_w * src_h * 4:
+        # Flat, uncompressed scanlines, converted one output row at a time.
+        rgbe = np.frombuffer(data, dtype=np.uint8, offset=pos).reshape(src_h, src_w, 4)
+        for y, (start, count) in enumerate(zip(rows.tolist(), row_counts.tolist())):
+            pixels[y] = np.add.reduceat(rgbe_to_float(rgbe[start:start + count]).sum(axis=0), columns, axis=0)
+    else:
+        if not 8 <= src_w <= 0x7fff or data[pos:pos + 2] != b"\x02\x02":
+            raise UnsupportedFormat("Old-style run length encoding")
+        for y in range(src_h):
+            rgbe, pos = decode_scanline(data, pos, src_w)
+            pixels[targets[y]] += np.add.reduceat(rgbe_to_float(rgbe), columns, axis=0)
+
+    pixels /= row_counts[:, None, None]
+    pixels /= np.diff(np.append(columns, src_w))[None, :, None]
+    if flip_x:
+        pixels = pixels[:, ::-1]
+    if flip_y:
+        pixels = pixels[::-1]
+    return np.ascontiguousarray(pixels, dtype=np.float32)
+
+def write(filepath, pixels):
+    """Writes a float (height, width, 3) array as flat RGBE scanlines."""
+    height, width = pixels.shape[:2]
+    pixels = np.maximum(pixels, 0.0)
+    brightest = pixels.max(axis=2)
+    mantissa, exponent = np.frexp(brightest)
+    visible = brightest > 1e-32
+    scale = np.where(visible, mantissa * 256.0 / np.where(visible, brightest, 1.0), 0.0)
+
+    rgbe = np.empty((height, width, 4), dtype=np.uint8)
+    rgbe[..., :3] = np.minimum(pixels * scale[..., None], 255.0).astype(np.uint8)
+    rgbe[..., 3] = np.where(visible, exponent + 128, 0)
+
+    with open(filepath, "wb") as f:
+        f.write(b"#?RADIANCE\nFORMAT=32-bit_rle_rgbe\n\n")
+        f.write(f"-Y {height} +X {width}\n".encode())
+        f.write(rgbe.tobytes())
+    return filepath
+
+def tonemap(pixels, exposure=0.0):
+    """Linear to 8-bit sRGB, same as saving a float image from Blender."""
+    linear = np.clip(pixels * 2.0 ** exposure, 0.0, 1.0)
+    srgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+    return np.round(srgb * 255.0).astype(np.uint8)
+
+# --------------------------------------------------------------------------
+# Baseline JPEG
+
+ZIGZAG = np.array([
+     0,  1,  8, 16,  9,  2,  3, 10, 17, 24, 32, 25, 18, 11,  4,  5,
+    12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13,  6,  7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61, 54, 47, 55, 62, 63,
+])
+
+QUANT_LUMINANCE = np.array([
+    16, 11, 10, 16,  24,  40,  51,  61,
+    12, 12, 14, 19,  26,  58,  60,  55,
+    14, 13, 16, 24,  40,  57,  69,  56,
+    14, 17, 22, 29,  51,  87,  80,  62,
+    18, 22, 37, 56,  68, 109, 103,  77,
+    24, 35, 55, 64,  81, 104, 113,  92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103,  99,
+])
+
+QUANT_CHROMINANCE = np.array([
+    17, 18, 24, 47, 99, 99, 99, 99,
+    18, 21, 26, 66, 99, 99, 99, 99,
+    24, 26, 56, 99, 99, 99, 99, 99,
+    47, 66, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+])
+
+# (BITS, HUFFVAL) from ITU T.81 Annex K.3
+HUFFMAN_DC_LUMINANCE = (
+    [0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0],
+    list(range(12)),
+)
+
+HUFFMAN_DC_CHROMINANCE = (
+    [0, 3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0],
+    list(range(12)),
+)
+
+HUFFMAN_AC_LUMINANCE = (
+    [0, 2, 1, 3, 3, 2, 4, 3, 5, 5, 4, 4, 0, 0, 1, 0x7d],
+    [
+        0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06, 0x13, 0x51, 0x61, 0x07,
+        0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xa1, 0x08, 0x23, 0x42, 0xb1, 0xc1, 0x15, 0x52, 0xd1, 0xf0,
+        0x24, 0x33, 0x62, 0x72, 0x82, 0x09, 0x0a, 0x16, 0x17, 0x18, 0x19, 0x1a, 0x25, 0x26, 0x27, 0x28,
+        0x29, 0x2a, 0x34, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3a, 0x43, 0x44, 0x45, 0x46, 0x47, 0x48, 0x49,
+        0x4a, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59, 0x5a, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68, 0x69,
+        0x6a, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79, 0x7a, 0x83, 0x84, 0x85, 0x86, 0x87, 0x88, 0x89,
+        0x8a, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9a, 0xa2, 0xa3, 0xa4, 0xa5, 0xa6, 0xa7,
+        0xa8, 0xa9, 0xaa, 0xb2, 0xb3, 0xb4, 0xb5, 0xb6, 0xb7, 0xb8, 0xb9, 0xba, 0xc2, 0xc3, 0xc4, 0xc5,
+        0xc6, 0xc7, 0xc8, 0xc9, 0xca, 0xd2, 0xd3, 0xd4, 0xd5, 0xd6, 0xd7, 0xd8, 0xd9, 0xda, 0xe1, 0xe2,
+        0xe3, 0xe4, 0xe5, 0xe6, 0xe7, 0xe8, 0xe9, 0xea, 0xf1, 0xf2, 0xf3, 0xf4, 0xf5, 0xf6, 0xf7, 0xf8,
+        0xf9, 0xfa,
+    ],
+)
+
+HUFFMAN_AC_CHROMINANCE = (
+    [0, 2, 1, 2, 4, 4, 3, 4, 7, 5, 4, 4, 0, 1, 2, 0x77],
+    [
+        0x00, 0x01, 0x02, 0x03, 0x11, 0x04, 0x05, 0x21, 0x31, 0x06, 0x12, 0x41, 0x51, 0x07, 0x61, 0x71,
+        0x13, 0x22, 0x32, 0x81, 0x08, 0x14, 0x42, 0x91, 0xa1, 0xb1, 0xc1, 0x09, 0x23, 0x33, 0x52, 0xf0,
+        0x15, 0x62, 0x72, 0xd1, 0x0a, 0x16, 0x24, 0x34, 0xe1, 0x25, 0xf1, 0x17, 0x18, 0x19, 0x1a, 0x26,
+        0x27, 0x28, 0x29, 0x2a, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3a, 0x43, 0x44, 0x45, 0x46, 0x47, 0x48,
+        0x49, 0x4a, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59, 0x5a, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68,
+        0x69, 0x6a, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79, 0x7a, 0x82, 0x83, 0x84, 0x85, 0x86, 0x87,
+        0x88, 0x89, 0x8a, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9a, 0xa2, 0xa3, 0xa4, 0xa5,
+        0xa6, 0xa7, 0xa8, 0xa9, 0xaa, 0xb2, 0xb3, 0xb4, 0xb5, 0xb6, 0xb7, 0xb8, 0xb9, 0xba, 0xc2, 0xc3,
+        0xc4, 0xc5, 0xc6, 0xc7, 0xc8, 0xc9, 0xca, 0xd2, 0xd3, 0xd4, 0xd5, 0xd6, 0xd7, 0xd8, 0xd9, 0xda,
+        0xe2, 0xe3, 0xe4, 0xe5, 0xe6, 0xe7, 0xe8, 0xe9, 0xea, 0xf2, 0xf3, 0xf4, 0xf5, 0xf6, 0xf7, 0xf8,
+        0xf9, 0xfa,
+    ],
+)
+
+def _dct_matrix():
+    k = np.arange(8)[:, None]
+    n = np.arange(8)[None, :]
+    matrix = np.sqrt(2 / 8) * np.cos((2 * n + 1) * k * np.pi / 16)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+DCT = _dct_matrix()
+
+def quant_table(table, quality):
+    scale = 5000 / quality if quality < 50 else 200 - quality * 2
+    return np.clip((table * scale + 50) // 100, 1, 255).astype(np.int32)
+
+def huffman_codes(table):
+    """Returns (codes, lengths) arrays indexed by symbol."""
+    bits, values = table
+    codes = np.zeros(256, dtype=np.int64)
+    lengths = np.zeros(256, dtype=np.int64)
+    code = 0
+    k = 0
+    for length, count in enumerate(bits, 1):
+        for _ in range(count):
+            codes[values[k]] = code
+            lengths[values[k]] = length
+            code += 1
+            k += 1
+        code <<= 1
+    return codes, lengths
+
+def categorize(values):
+    """Returns the JPEG magnitude category and its extra bits."""
+    magnitude = np.abs(values)
+    size = np.zeros(values.shape, dtype=np.int64)
+    nonzero = magnitude > 0
+    size[nonzero] = np.floor(np.log2(magnitude[nonzero])).astype(np.int64) + 1
+    extra = np.where(values < 0, values + (1 << size) - 1, values)
+    return size, extra
+
+def encode_blocks(blocks, components):
+    """Huffman encodes zigzagged {blocks} (in scan order) to entropy coded
+    bytes. {components} holds the component index of each block.
+    """
+    tables = [
+        (huffman_codes(HUFFMAN_DC_LUMINANCE), huffman_codes(HUFFMAN_AC_LUMINANCE)),
+        (huffman_codes(HUFFMAN_DC_CHROMINANCE), huffman_codes(HUFFMAN_AC_CHROMINANCE)),
+    ]
+    table = np.minimum(components, 1)
+    n_blocks = len(blocks)
+
+    # DC differences are taken per component.
+    dc = blocks[:, 0]
+    diff = np.empty_like(dc)
+    for component in np.unique(components):
+        mask = components == component
+        diff[mask] = np.diff(dc[mask], prepend=0)
+
+    # Every symbol gets a sort key so it lands in place within its block:
+    ## DC at 0, ZRLs at 2k-1 and the coefficient at 2k, EOB at 129.
+    block, k = np.nonzero(blocks[:, 1:])
+    k += 1
+    values = blocks[block, k]
+    previous = np.zeros_like(k)
+    # NOTE: Sized from {block}, which is empty when no block has AC
+    ## coefficients, e.g. flat or clipped images.
+    same = np.zeros(len(block), dtype=bool)
+    same[1:] = block[1:] == block[:-1]
+    previous[same] = k[:-1][same[1:]]
+    run = k - previous - 1
+    zrl = run // 16
+    run %= 16
+
+    last = np.zeros(n_blocks, dtype=np.int64)
+    np.maximum.at(last, block, k)
+    eob = np.nonzero(last < 63)[0]
+
+    zrl_block = np.repeat(block, zrl)
+    dc_size, dc_extra = categorize(diff)
+    ac_size, ac_extra = categorize(values)
+
+    keys = np.concatenate([
+        np.arange(n_blocks) * 130,
+        zrl_block * 130 + np.repeat(2 * k - 1, zrl),
+        block * 130 + 2 * k,
+        eob * 130 + 129,
+    ])
+    symbols = np.concatenate([dc_size, np.full(len(zrl_block), 0xF0), (run << 4) | ac_size, np.zeros(len(eob), dtype=np.int64)])
+    is_dc = np.concatenate([np.ones(n_blocks, dtype=bool), np.zeros(len(zrl_block) + len(block) + len(eob), dtype=bool)])
+    owner = np.concatenate([np.arange(n_blocks), zrl_block, block, eob])
+    extra = np.concatenate([dc_extra, np.zeros(len(zrl_block), dtype=np.int64), ac_extra, np.zeros(len(eob), dtype=np.int64)])
+    extra_size = np.concatenate([dc_size, np.zeros(len(zrl_block), dtype=np.int64), ac_size, np.zeros(len(eob), dtype=np.int64)])
+
+    order = np.argsort(keys, kind="stable")
+    symbols, is_dc, owner, extra, extra_size = symbols[order], is_dc[order], owner[order], extra[order], extra_size[order]
+
+    codes = np.zeros(len(symbols), dtype=np.int64)
+    lengths = np.zeros(len(symbols), dtype=np.int64)
+    for t, (dc_table, ac_table) in enumerate(tables):
+        for kind, (t_codes, t_lengths) in ((True, dc_table), (False, ac_table)):
+            mask = (table[owner] == t) & (is_dc == kind)
+            codes[mask] = t_codes[symbols[mask]]
+            lengths[mask] = t_lengths[symbols[mask]]
+
+    # Interleave each code with its extra bits and expand to single bits.
+    fields = np.stack([codes, extra]).T.ravel()
+    sizes = np.stack([lengths, extra_size]).T.ravel()
+    total = int(sizes.sum())
+    starts = np.cumsum(sizes) - sizes
+    position = np.arange(total) - np.repeat(starts, sizes)
+    shift = np.repeat(sizes, sizes) - 1 - position
+    bits = (np.repeat(fields, sizes) >> shift) & 1
+
+    padding = -total % 8
+    bits = np.concatenate([bits, np.ones(padding, dtype=np.int64)]).astype(np.uint8)
+    data = np.packbits(bits)
+
+    # Byte stuffing.
+    stuff = np.nonzero(data == 0xFF)[0] + 1
+    return np.insert(data, stuff, 0).tobytes()
+
+def _marker(code, payload):
+    return bytes([0xFF, code]) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+def _dht(table_class, table_id, table):
+    bits, values = table
+    return _marker(0xC4, bytes([table_class << 4 | table_id]) + bytes(bits) + bytes(values))
+
+def write_jpeg(filepath, pixels, quality=90):
+    """Writes (height, width, 3) uint8 sRGB {pixels} as a baseline JPEG."""
+    height, width = pixels.shape[:2]
+    rgb = pixels.astype(np.float32)
+    ycbcr = np.stack([
+        0.299 * rgb[..., 0] + 0.587 * rgb[..., 1] + 0.114 * rgb[..., 2] - 128,
+        -0.168736 * rgb[..., 0] - 0.331264 * rgb[..., 1] + 0.5 * rgb[..., 2],
+        0.5 * rgb[..., 0] - 0.418688 * rgb[..., 1] - 0.081312 * rgb[..., 2],
+    ])
+
+    # Pad to full blocks repeating the edge pixels.
+    pad_y = -height % 8
+    pad_x = -width % 8
+    ycbcr = np.pad(ycbcr, ((0, 0), (0, pad_y), (0, pad_x)), mode="edge")
+    rows, columns = ycbcr.shape[1] // 8, ycbcr.shape[2] // 8
+
+    # (component, row, column, 8, 8) then MCU order: row, column, component.
+    blocks = ycbcr.reshape(3, rows, 8, columns, 8).transpose(1, 3, 0, 2, 4)
+    coefficients = DCT @ blocks @ DCT.T
+
+    q_luminance = quant_table(QUANT_LUMINANCE, quality)
+    q_chrominance = quant_table(QUANT_CHROMINANCE, quality)
+    quant = np.stack([q_luminance, q_chrominance, q_chrominance]).reshape(3, 8, 8)
+    quantized = np.round(coefficients / quant).astype(np.int64)
+    zigzagged = quantized.reshape(-1, 64)[:, ZIGZAG]
+    components = np.tile(np.arange(3), rows * columns)
+
+    header = b"\xFF\xD8"
+    header += _marker(0xE0, b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
+    header += _marker(0xDB, b"\x00" + bytes(q_luminance[ZIGZAG].tolist()))
+    header += _marker(0xDB, b"\x01" + bytes(q_chrominance[ZIGZAG].tolist()))
+    header += _marker(0xC0, b"\x08" + height.to_bytes(2, "big") + width.to_bytes(2, "big") + b"\x03\x01\x11\x00\x02\x11\x01\x03\x11\x01")
+    header += _dht(0, 0, HUFFMAN_DC_LUMINANCE)
+    header += _dht(1, 0, HUFFMAN_AC_LUMINANCE)
+    header += _dht(0, 1, HUFFMAN_DC_CHROMINANCE)
+    header += _dht(1, 1, HUFFMAN_AC_CHROMINANCE)
+    header += _marker(0xDA, b"\x03\x01\x00\x02\x11\x03\x11\x00\x3F\x00")
+
+    with open(filepath, "wb") as f:
+        f.write(header)
+        f.write(encode_blocks(zigzagged, components))
+        f.write(b"\xFF\xD9")
+    return filepath
+
+# --------------------------------------------------------------------------
+# Analysis
+
+LUMINANCE = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+def analyze(pixels, grid=(32, 64)):
+    """Returns the brightest region direction and exposure statistics of an
+    equirectangular (height, width, 3) image, top row first.
+
+    Azimuth follows sun_position: clockwise from +Y, in the image space the
+    environment texture samples before any mapping rotation.
+    """
+    height, width = pixels.shape[:2]
+    luminance = pixels @ LUMINANCE
+    elevations = (0.5 - (np.arange(height) + 0.5) / height) * np.pi
+    # NOTE: Equirectangular rows near the poles cover less solid angle.
+    weights = np.broadcast_to(np.cos(elevations)[:, None], luminance.shape)
+
+    # Brightest cell first so a single hot pixel doesn't win over the sun.
+    rows = bins(height, min(grid[0], height))
+    columns = bins(width, min(grid[1], width))
+    cells = np.add.reduceat(np.add.reduceat(luminance, rows, axis=0), columns, axis=1)
+    cells /= np.outer(np.diff(np.append(rows, height)), np.diff(np.append(columns, width)))
+    r, c = np.unravel_index(np.argmax(cells), cells.shape)
+
+    r0, r1 = rows[r], rows[r + 1] if r + 1 < len(rows) else height
+    c0, c1 = columns[c], columns[c + 1] if c + 1 < len(columns) else width
+    y, x = np.unravel_index(np.argmax(luminance[r0:r1, c0:c1]), (r1 - r0, c1 - c0))
+    y += r0
+    x += c0
+
+    # NOTE: Cycles maps u = 0.5 - atan2(y, x) / 2pi.
+    alpha = (0.5 - (x + 0.5) / width) * 2 * np.pi
+    azimuth = (np.pi / 2 - alpha) % (2 * np.pi)
+
+    peak = float(luminance.max())
+    lit = luminance[luminance > 0]
+    if len(lit):
+        low, high = np.percentile(lit, [0.1, 99.9])
+        dynamic_range = float(np.log2(max(high, 1e-9) / max(low, 1e-9)))
+    else:
+        dynamic_range = 0.0
+
+    return {
+        "azimuth" : float(azimuth),
+        "elevation" : float(elevations[y]),
+        "luminance" : float((luminance * weights).sum() / weights.sum()),
+        "peak" : peak,
+        "dynamic_range" : dynamic_range,
+        # NOTE: Share of the sphere sitting at the peak value, a flat top
+        ## means the sun was clipped when captured.
+        "clipped" : float(weights[luminance >= peak * 0.99].sum() / weights.sum()) if peak > 0 else 0.0,
+    }
+
+# --------------------------------------------------------------------------
+
+def generate_thumbnail(filepath, outpath, width=500):
+    if not filepath.lower().endswith(".hdr"):
+        raise UnsupportedFormat("Only Radiance files are supported")
+    return write_jpeg(outpath, tonemap(read(filepath, width=width)))
+
+def generate_proxy(filepath, outpath, width=2048):
+    if not filepath.lower().endswith(".hdr"):
+        raise UnsupportedFormat("Only Radiance files are supported")
+    return write(outpath, read(filepath, width=width))
+
+def generate_analysis(filepath, outpath=None, width=512):
+    if not filepath.lower().endswith(".hdr"):
+        raise UnsupportedFormat("Only Radiance files are supported")
+    return analyze(read(filepath, width=width))
@@ -0,0 +1,135 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+import calendar
+import datetime
+import functools
+import math
+import os
+import zoneinfo
+
+import numpy as np
+
+DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tz.tab")
+
+# NOTE: Positions farther than this from every reference point, in degrees of
+## arc (~1700km), are taken to be at sea and get a nautical zone instead.
+MAX_ANGLE = 15.0
+
+def parse_iso6709(text):
+    """Returns (latitude, longitude) in degrees from "+DDMM+DDDMM" or
+    "+DDMMSS+DDDMMSS".
+    """
+    split = max(text.rfind("+"), text.rfind("-"))
+    values = []
+    for part, width in ((text[:split], 2), (text[split:], 3)):
+        sign = -1.0 if part[0] == "-" else 1.0
+        digits = part[1:]
+        degrees = int(digits[:width])
+        minutes = int(digits[width:width + 2])
+        seconds = int(digits[width + 2:] or 0)
+        values.append(sign * (degrees + minutes / 60 + seconds / 3600))
+    return tuple(values)
+
+def to_vectors(latitude, longitude):
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    return np.stack((
+        np.cos(latitude) * np.cos(longitude),
+        np.cos(latitude) * np.sin(longitude),
+        np.sin(latitude),
+    ), axis=-1)
+
+class ZoneIndex():
+    """Nearest reference point lookup over DATASET, points are kept as unit
+    vectors so the nearest one is a single matrix product away.
+    """
+    def __init__(self, filepath=DATASET):
+        coordinates = []
+        self.zones = []
+        with open(filepath, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#") or not line.strip():
+                    continue
+                coordinate, zone = line.split()
+                coordinates.append(parse_iso6709(coordinate))
+                self.zones.append(zone)
+        latitude, longitude = np.array(coordinates).T
+        self.vectors = to_vectors(latitude, longitude)
+        self.min_dot = math.cos(math.radians(MAX_ANGLE))
+        return None
+
+    def lookup(self, latitude, longitude):
+        dots = self.vectors @ to_vectors(latitude, longitude)
+        nearest = int(np.argmax(dots))
+        if dots[nearest] < self.min_dot:
+            return nautical_zone(longitude)
+        return self.zones[nearest]
+
+def nautical_zone(longitude):
+    # NOTE: Etc/GMT zones have the sign flipped, Etc/GMT-3 is UTC+3.
+    hours = round(((longitude + 180) % 360 - 180) / 15)
+    return "Etc/GMT" if hours == 0 else f"Etc/GMT{-hours:+d}"
+
+_index = None
+
+def lookup(latitude, longitude):
+    """IANA timezone name of the nearest reference city, the dataset is only
+    loaded on the first call. The nearest city is often across a border,
+    e.g. Kansas City gets America/Indiana/Vincennes, so the result is only a
+    suggestion and must never be applied without the user confirming it.
+    """
+    global _index
+    if _index is None:
+        _index = ZoneIndex()
+    return _index.lookup(latitude, longitude)
+
+def load(zone):
+    """Returns the tzinfo of {zone}, or None when it can't be loaded, e.g. on
+    Windows without the tzdata package.
+    """
+    try:
+        return zoneinfo.ZoneInfo(zone)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError, OSError):
+        return None
+
+@functools.lru_cache(maxsize=None)
+def is_available(zone):
+    return load(zone) is not None
+
+def get_offset(zone, year, month, day, time=12.0):
+    """Returns (standard offset, daylight saving) in hours for {zone} at the
+    local {time} of that date, or None when the zone can't be loaded.
+    """
+    tzinfo = load(zone)
+    if tzinfo is None:
+        return None
+    day = min(day, calendar.monthrange(year, month)[1])
+    date = datetime.datetime(year, month, day, tzinfo=tzinfo) + datetime.timedelta(hours=time)
+    offset = date.utcoffset()
+    dst = date.dst() or datetime.timedelta(0)
+    return (offset - dst).total_seconds() / 3600, dst.total_seconds() / 3600
+
+def get_offsets(zone, year, month, day, time):
+    """Total UTC offsets in hours of {zone} for arrays of dates and local
+    times, broadcast against each other, or None when the zone can't be
+    loaded. Days past the end of the month carry over like in
+    get_sun_coordinates_batch.
+
+    Offsets are looked up once per date and whole hour, daylight saving
+    changes happen on the hour in nearly every zone.
+    """
+    tzinfo = load(zone)
+    if tzinfo is None:
+        return None
+    year, month, day, hour = np.broadcast_arrays(*(np.asarray(a, dtype=np.int64) for a in (
+        year, month, day, np.floor(time))))
+    # NOTE: Packed in a single integer, np.unique on rows is much slower.
+    keys = ((year * 16 + month) * 1024 + day) * 32 + hour
+    unique, inverse = np.unique(keys.ravel(), return_inverse=True)
+    offsets = np.empty(len(unique), dtype=np.float64)
+    for i, key in enumerate(unique.tolist()):
+        key, h = divmod(key, 32)
+        key, d = divmod(key, 1024)
+        y, m = divmod(key, 16)
+        # NOTE: Aware datetime arithmetic is wall clock arithmetic.
+        date = datetime.datetime(y, m, 1, tzinfo=tzinfo) + datetime.timedelta(days=d - 1, hours=h)
+        offsets[i] = date.utcoffset().total_seconds() / 3600
+    return offsets[inverse.ravel()].reshape(year.shape)
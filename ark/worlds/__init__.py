@@ -60,9 +60,17 @@ class ARK_PT_PROPERTIES_World(bpy.types.Panel):
                             info.operator(hdri.ARK_OT_CreateWorldHDRI.bl_idname, text="Missing world nodes, fix it?")
                         else:
                             hdri.handle_existing_world(world)
+                            body.prop(session.hdri, "search", text="", icon='VIEWZOOM')
                             body.template_icon_view(session.hdri, "preview", scale=10)
 
-                            buttons.operator(hdri.ARK_OT_ReloadHDRIPreviews.bl_idname, icon='NODE_COMPOSITING')
+                            job = hdri.thumbnail_job
+                            if job is None:
+                                if hdri.library_scan is not None:
+                                    utils.bpy.ui.label(info, text="Scanning library...")
+                                buttons.operator(hdri.ARK_OT_ReloadHDRIPreviews.bl_idname, icon='NODE_COMPOSITING')
+                            else:
+                                info.progress(factor=job.progress, type='BAR', text=f"Generating thumbnails {job.done}/{job.total}")
+                                buttons.operator(hdri.ARK_OT_CancelHDRIPreviews.bl_idname, icon='CANCEL')
 
                             section = layout.box()
                             section.use_property_split = True
@@ -160,6 +168,20 @@ class ARK_PT_PROPERTIES_World(bpy.types.Panel):
                         row = utils.bpy.ui.split(col, text="Latitude/Longitude  ")
                         row.prop(pr_sun, "latitude", text="")
                         row.prop(pr_sun, "longitude", text="")
+                        row = utils.bpy.ui.split(col, text="Timezone")
+                        row.prop(pr_sun, "timezone", text="")
+                        row.operator(sun_position.ARK_OT_SunPositionFindTimezone.bl_idname, icon='VIEWZOOM', text="")
+                        # NOTE: The nearest city is only a suggestion, it can be
+                        ## across a border. The UTC zone stays editable and editing
+                        ## it drops the timezone.
+                        suggestion = utils.tz.lookup(pr_sun.latitude, pr_sun.longitude)
+                        if suggestion != pr_sun.timezone:
+                            col.label(text=f"Suggested: {suggestion}", icon='INFO')
+                        if pr_sun.timezone and not utils.tz.is_available(pr_sun.timezone):
+                            col.label(text="Timezone not found, set the UTC zone", icon='ERROR')
+                        row = utils.bpy.ui.split(col, text="UTC Zone")
+                        row.prop(pr_sun, "UTC_zone", text="")
+                        row.prop(pr_sun, "use_daylight_savings", icon='TIME', icon_only=True)
 
                         col = section.column(align=True)
                         row = utils.bpy.ui.split(col, text="Time")
@@ -178,6 +200,9 @@ class ARK_PT_PROPERTIES_World(bpy.types.Panel):
                         col = section.column(align=True)
                         col.prop_search(pr_sun, "sky_texture", world.node_tree, "nodes")
                         col.prop(pr_sun, "sun_object")
+                        col.prop(pr_sun, "use_lookup_table")
+                        col.operator(sun_position.ARK_OT_SunPositionBake.bl_idname, icon='KEYINGSET')
+                        col.operator(sun_position.ARK_OT_SunPositionInsolation.bl_idname, icon='LIGHT_SUN')
 
                         col = section.column(align=True)
                         row = utils.bpy.ui.split(col, text="Google Maps")
@@ -185,6 +210,23 @@ class ARK_PT_PROPERTIES_World(bpy.types.Panel):
                         _.operator(sun_position.ARK_OT_SunPositionOpenGMaps.bl_idname, text="Open Link")
                         _.operator(sun_position.ARK_OT_SunPositionPasteGMaps.bl_idname, text="Paste Link")
 
+                        row = col.row()
+                        row.template_list(
+                            sun_position.ARK_UL_PROPERTIES_SunPositionSites.__name__,
+                            "",
+                            pr_sun,
+                            "sites",
+                            pr_sun,
+                            "site_index",
+                            rows = 3,
+                        )
+                        _ = row.column(align=True)
+                        _.operator(sun_position.ARK_OT_SunPositionAddSite.bl_idname, icon='ADD')
+                        _.operator(sun_position.ARK_OT_SunPositionRemoveSite.bl_idname, icon='REMOVE')
+                        _.separator()
+                        _.operator(sun_position.ARK_OT_SunPositionUseSite.bl_idname, icon='CHECKMARK')
+                        _.operator(sun_position.ARK_OT_SunPositionImportSites.bl_idname, icon='IMPORT', text="")
+
                         n_env = sky.get_env_node(world)
                         section = layout.box()
                         section.use_property_split = True
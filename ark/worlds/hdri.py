@@ -1,7 +1,15 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
+import bisect
+import collections
+import concurrent.futures
+import hashlib
+import itertools
 import os
-import glob
 import json
+import re
+import threading
+import time
+import traceback
 
 import bpy
 import bpy.utils.previews
@@ -9,99 +17,877 @@ import bpy.utils.previews
 from ark import utils
 addon = utils.bpy.Addon()
 
+from . import common
+
 global bl_previews
 
 SUPPORTED_FORMATS = {".hdr", ".exr"}
+THUMBNAIL_SIZE = 500
+ANALYSIS_SIZE = 512
+HASH_CHUNK = 65536
+SCAN_THREADS = 8
+TAGS_EXTENSION = ".tags"
+AUDIT_TTL = 5.0
+
+global library_status
+library_status = (None, False, 0.0)
 
 def audit_library():
-    return os.path.exists(bpy.path.abspath(addon.preferences.library))
+    """Checks the library exists at most every AUDIT_TTL seconds, it's
+    called on every draw and can be a network round trip.
+    """
+    global library_status
+    library = bpy.path.abspath(addon.preferences.library)
+    path, exists, checked = library_status
+    now = time.monotonic()
+    if path != library or now - checked > AUDIT_TTL:
+        exists = os.path.exists(library)
+        library_status = (library, exists, now)
+    return exists
+
+def file_hash(path, size):
+    """Fast content hash from the size and the first and last chunks of
+    the file, so renamed, moved or duplicated HDRIs share their thumbnails.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(HASH_CHUNK))
+        if size > HASH_CHUNK * 2:
+            f.seek(-HASH_CHUNK, os.SEEK_END)
+        digest.update(f.read(HASH_CHUNK))
+    return digest.hexdigest()
+
+def tokenize(text):
+    """Splits names like "KloppenheimSunset_4k" into lowercase words."""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def read_tags(path):
+    """Sidecar tags are comma or line separated words in a text file named
+    like the HDRI, with the .tags extension.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [t.strip() for t in re.split(r"[,\n]", f.read()) if t.strip()]
+    except (OSError, ValueError):
+        return []
 
-def reload_thumbnails(generate=False, force=False):
+def get_library_paths():
     library = bpy.path.abspath(addon.preferences.library)
     lib_thumbnails = bpy.path.abspath(addon.preferences.lib_thumbnails)
+    if lib_thumbnails == "":
+        lib_thumbnails = os.path.join(library, "_thumbnails")
+    return library, lib_thumbnails
 
-    hdris = {os.path.basename(p) : p for p in glob.glob(os.path.join(library, "**"), recursive=True) if os.path.splitext(p)[1] in SUPPORTED_FORMATS}
-    _thumbnails = {os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(lib_thumbnails, "*.jpg"))}
-    _hdris = set(hdris.keys())
+class LibraryIndex():
+    """Manifest of every HDRI in the library, stored as JSON next to the
+    thumbnails so it survives sessions.
 
-    to_remove = _thumbnails.difference(_hdris)
-    for name in to_remove:
-        print("DELETING: ", name)
-        os.remove(os.path.join(lib_thumbnails, name + ".jpg"))
+    {files} maps paths to their size, mtime and content hash, {assets} maps
+    hashes to their thumbnail, proxy and analysis state.
+    """
+    FILENAME = "index.json"
+    VERSION = 3
+    # NOTE: Shared between instances so a replaced index never reuses
+    ## the generation cached by PreviewCache.
+    generations = itertools.count(1)
 
-    thumbnails = list(_thumbnails.difference(to_remove))
-    if generate:
-        to_generate = _hdris.difference(_thumbnails) if force == False else hdris
+    def __init__(self, library, lib_thumbnails):
+        self.library = os.path.normpath(library)
+        self.lib_thumbnails = os.path.normpath(lib_thumbnails)
+        self.dirs = {}
+        self.files = {}
+        self.assets = {}
+        self.hdris = {}
+        self.tokens = {}
+        self.vocabulary = []
+        self.generation = 0
+        self.ready = False
+        return None
 
-        for name in to_generate:
-            print("GENERATING: ", name)
-            thumbnails.append(
-                utils.bpy.img.generate_thumbnail(hdris[name], os.path.join(lib_thumbnails, name + ".jpg"))
-            )
+    def copy(self):
+        index = LibraryIndex(self.library, self.lib_thumbnails)
+        index.dirs = dict(self.dirs)
+        index.files = dict(self.files)
+        # NOTE: Assets are updated in place by ThumbnailJob.
+        index.assets = {digest : dict(asset) for digest, asset in self.assets.items()}
+        index.hdris = dict(self.hdris)
+        index.tokens = self.tokens
+        index.vocabulary = self.vocabulary
+        index.generation = self.generation
+        index.ready = self.ready
+        return index
 
-    addon.session.hdris = json.dumps(hdris)
-    return thumbnails
+    @property
+    def filepath(self):
+        return os.path.join(self.lib_thumbnails, self.FILENAME)
 
-def enum_previews(self, context):
-    lib_thumbnails = bpy.path.abspath(addon.preferences.lib_thumbnails)
-    return load_previews({p for p in glob.glob(os.path.join(lib_thumbnails, "*.jpg"))})
+    def load(self):
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
 
-def load_previews(thumbnails):
-    global bl_previews
+        if data.get("version") != self.VERSION or data.get("library") != self.library:
+            return False
 
-    enum_items = []
+        self.dirs = data["dirs"]
+        self.files = data["files"]
+        self.assets = data["assets"]
+        self.update_hdris()
+        return True
 
-    i = 0
-    for fp in thumbnails:
-        fn = os.path.basename(fp)
-        name = os.path.splitext(fn)[0]
+    def save(self):
+        data = {
+            "version" : self.VERSION,
+            "library" : self.library,
+            "dirs" : self.dirs,
+            "files" : self.files,
+            "assets" : self.assets,
+        }
+        os.makedirs(self.lib_thumbnails, exist_ok=True)
+        # NOTE: Write to a temporary file first so a crash never leaves
+        ## a truncated index behind.
+        tmp = self.filepath + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.filepath)
+        return None
 
-        icon = bl_previews.get(fn)
-        if icon is None:
-            thumb = bl_previews.load(fn, fp, 'IMAGE')
-        else:
-            thumb = bl_previews[fn]
+    def refresh(self, threads=SCAN_THREADS):
+        """Only rescans directories whose mtime changed since last refresh.
+        Each level of subdirectories is scanned in parallel, as every stat
+        is a round trip on network shares.
+        """
+        changed = False
+        seen = set()
+        level = [self.library]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            while level:
+                # NOTE: scan_dir only reads the index, the results are
+                ## merged here one directory at a time.
+                results = list(executor.map(self.scan_dir, level))
+                level = []
+                for path, entry, files in results:
+                    if entry is None:
+                        continue
+                    seen.add(path)
+                    if files is not None:
+                        self.merge_dir(path, entry, files)
+                        changed = True
+                    level.extend(entry["subdirs"])
+
+        for path in set(self.dirs).difference(seen):
+            for fp in self.dirs.pop(path)["files"]:
+                self.files.pop(fp, None)
+            changed = True
+
+        if changed:
+            self.update_hdris()
+            self.save()
+        return changed
+
+    def scan_dir(self, path):
+        """Returns the directory entry and, if its mtime changed, the files
+        found in it. The entry is None when the directory is gone.
+        """
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return path, None, None
+
+        entry = self.dirs.get(path)
+        if entry is not None and entry["mtime"] == mtime:
+            return path, entry, None
+
+        subdirs = []
+        files = {}
+        sidecars = {}
+        try:
+            with os.scandir(path) as it:
+                for item in it:
+                    stem, ext = os.path.splitext(item.name)
+                    if item.is_dir():
+                        if os.path.normpath(item.path) != self.lib_thumbnails:
+                            subdirs.append(item.path)
+                    elif ext == TAGS_EXTENSION:
+                        sidecars[stem] = item.path
+                    elif ext in SUPPORTED_FORMATS:
+                        stat = item.stat()
+                        old = self.files.get(item.path)
+                        if old is None or old["size"] != stat.st_size or old["mtime"] != stat.st_mtime:
+                            try:
+                                digest = file_hash(item.path, stat.st_size)
+                            except OSError:
+                                continue
+                            old = {
+                                "size" : stat.st_size,
+                                "mtime" : stat.st_mtime,
+                                "hash" : digest,
+                            }
+                        files[item.path] = old
+        except OSError:
+            return path, None, None
+
+        for fp, f in files.items():
+            sidecar = sidecars.get(os.path.splitext(os.path.basename(fp))[0])
+            tags = read_tags(sidecar) if sidecar is not None else []
+            if f.get("tags", []) != tags:
+                # NOTE: Entries may be shared with the published index.
+                files[fp] = dict(f, tags=tags)
+
+        entry = {
+            "mtime" : mtime,
+            "subdirs" : subdirs,
+            "files" : list(files),
+        }
+        return path, entry, files
 
-        enum_items.append((name, name, "", thumb.icon_id, i))
-        i +=1
+    def merge_dir(self, path, entry, files):
+        if path in self.dirs:
+            for fp in set(self.dirs[path]["files"]).difference(files):
+                self.files.pop(fp, None)
+        self.dirs[path] = entry
+        self.files.update(files)
+        for f in files.values():
+            self.add_asset(f["hash"])
+        return None
+
+    def add_asset(self, digest):
+        if digest not in self.assets:
+            # NOTE: Pick up files left by a previous index, or a duplicate.
+            self.assets[digest] = {
+                "thumbnail" : os.path.exists(self.get_thumbnail(digest)),
+                "proxy" : os.path.exists(self.get_proxy(digest)),
+            }
+        return self.assets[digest]
+
+    def update_hdris(self):
+        """HDRIs are identified by their path relative to the library, so
+        files sharing a name in different folders don't collide.
+        """
+        self.hdris = {self.get_id(p) : p for p in self.files}
+
+        # NOTE: Inverted index from words in the folders, file name and
+        ## sidecar tags of each HDRI to their ids.
+        tokens = collections.defaultdict(set)
+        for name, path in self.hdris.items():
+            words = tokenize(os.path.splitext(name)[0])
+            for tag in self.files[path].get("tags", []):
+                words.extend(tokenize(tag))
+            for word in words:
+                tokens[word].add(name)
+        self.tokens = dict(tokens)
+        self.vocabulary = sorted(tokens)
+        self.generation = next(self.generations)
+        return None
+
+    def search(self, query):
+        """Returns the ids matching every word of {query} as a prefix, or
+        None when the query is empty.
+        """
+        result = None
+        for word in tokenize(query):
+            matches = set()
+            i = bisect.bisect_left(self.vocabulary, word)
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(word):
+                matches.update(self.tokens[self.vocabulary[i]])
+                i += 1
+            result = matches if result is None else result & matches
+            if not result:
+                break
+        return result
+
+    def get_id(self, path):
+        return os.path.relpath(path, self.library).replace(os.sep, "/")
+
+    def get_asset(self, name):
+        path = self.hdris.get(name)
+        return None if path is None else self.assets.get(self.files[path]["hash"])
+
+    def get_thumbnail(self, digest):
+        return os.path.join(self.lib_thumbnails, digest + ".jpg")
+
+    @property
+    def lib_proxies(self):
+        return os.path.join(self.lib_thumbnails, "proxies")
+
+    def get_proxy(self, digest):
+        return os.path.join(self.lib_proxies, digest + ".hdr")
+
+    def has_thumbnail(self, name):
+        asset = self.get_asset(name)
+        return asset is not None and asset["thumbnail"]
+
+    def get_analysis(self, name):
+        asset = self.get_asset(name)
+        return None if asset is None else asset.get("analysis")
+
+    def remove_orphans(self):
+        """Drops assets no file points to anymore, with their thumbnails
+        and proxies.
+        """
+        hashes = {f["hash"] for f in self.files.values()}
+        for digest in set(self.assets).difference(hashes):
+            del self.assets[digest]
+        remove_orphans(self.lib_thumbnails, hashes, ".jpg")
+        remove_orphans(self.lib_proxies, hashes, ".hdr")
+        return None
+
+global library_index
+library_index = None
+
+def get_index():
+    """Returns the library index, it starts empty and is filled by a
+    background scan the first time it's requested in a session.
+    """
+    global library_index
+    library, lib_thumbnails = get_library_paths()
+    if library_index is None or library_index.library != os.path.normpath(library):
+        library_index = LibraryIndex(library, lib_thumbnails)
+        scan_library()
+    return library_index
+
+class LibraryScan():
+    """Loads and refreshes a copy of the index in a thread, then publishes
+    it from bpy.app.timers so drawing never waits on the filesystem.
+    """
+    INTERVAL = 0.1
+
+    def __init__(self, index, clean=False):
+        self.base = index
+        # NOTE: Copied here on the main thread, the thread never reads the
+        ## live index while it's being updated.
+        self.copy = index.copy()
+        self.index = None
+        self.clean = clean
+        self.callbacks = []
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        return None
+
+    def start(self):
+        self.thread.start()
+        bpy.app.timers.register(self.poll, first_interval=self.INTERVAL, persistent=True)
+        return None
 
-    if len(enum_items) == 0:
-        pass
-    return enum_items
+    def run(self):
+        index = self.copy
+        try:
+            if not index.ready:
+                index.load()
+            index.refresh()
+            if self.clean:
+                index.remove_orphans()
+                index.save()
+        except OSError as e:
+            print("FAILED: ", index.library, e)
+        except Exception as e:
+            # NOTE: Anything else, e.g. a corrupt index file, leaves the
+            ## copy half updated, the previous index stays published.
+            traceback.print_exc()
+            print("FAILED: ", index.library, e)
+            return None
+        index.ready = True
+        self.index = index
+        return None
+
+    def poll(self):
+        global library_index
+        global library_scan
+        if self.thread.is_alive():
+            return self.INTERVAL
+
+        library_scan = None
+        if library_index is self.base:
+            if self.index is None:
+                # NOTE: The scan failed, callbacks expect a refreshed index.
+                tag_redraw()
+                return None
+            library_index = self.index
+            # NOTE: Thumbnails finished during the scan went to the live
+            ## index, the copy it started from is missing them.
+            for digest, asset in self.base.assets.items():
+                if digest in library_index.assets:
+                    library_index.assets[digest].update(asset)
+            if self.clean:
+                library_index.save()
+            for callback in self.callbacks:
+                callback()
+        elif library_index is not None:
+            # NOTE: The library changed while scanning.
+            scan_library()
+        tag_redraw()
+        return None
+
+    def cancel(self):
+        global library_scan
+        if bpy.app.timers.is_registered(self.poll):
+            bpy.app.timers.unregister(self.poll)
+        library_scan = None
+        return None
+
+global library_scan
+library_scan = None
+
+def scan_library(callback=None, clean=False):
+    """Refreshes the index in the background, {callback} runs once it's
+    published.
+    """
+    global library_scan
+    if library_scan is None:
+        library_scan = LibraryScan(get_index(), clean=clean)
+        library_scan.start()
+    else:
+        library_scan.clean |= clean
+    if callback is not None:
+        library_scan.callbacks.append(callback)
+    return None
+
+def remove_orphans(folder, names, extension):
+    if not os.path.isdir(folder):
+        return None
+    for fn in os.listdir(folder):
+        name, ext = os.path.splitext(fn)
+        if ext == extension and name not in names:
+            print("DELETING: ", fn)
+            os.remove(os.path.join(folder, fn))
+    return None
+
+def reload_thumbnails(force=False):
+    """Returns the jobs needed to generate the missing thumbnails, proxies
+    and analysis of the index, once per content hash.
+    """
+    preferences = addon.preferences
+    index = get_index()
+
+    sources = {}
+    for path, f in index.files.items():
+        sources.setdefault(f["hash"], path)
+
+    jobs = []
+    for digest, path in sources.items():
+        asset = index.add_asset(digest)
+        if force or not asset["thumbnail"]:
+            jobs.append({"kind" : 'THUMBNAIL', "filepath" : path, "outpath" : index.get_thumbnail(digest), "width" : THUMBNAIL_SIZE, "hash" : digest})
+        if preferences.use_proxies and (force or not asset["proxy"]):
+            jobs.append({"kind" : 'PROXY', "filepath" : path, "outpath" : index.get_proxy(digest), "width" : preferences.proxy_size, "hash" : digest})
+        if force or "analysis" not in asset:
+            jobs.append({"kind" : 'ANALYSIS', "filepath" : path, "outpath" : None, "width" : ANALYSIS_SIZE, "hash" : digest})
+    return jobs
+
+class ThumbnailJob():
+    """Generates thumbnails, proxies and analysis in the background, driven by
+    bpy.app.timers. Previews are registered as soon as each thumbnail is done.
+    """
+    INTERVAL = 0.1
+
+    def __init__(self, index, jobs, size=None):
+        self.index = index
+        # NOTE: Results by hash, the index can be replaced by a scan while
+        ## generating so they're merged into whichever index is live.
+        self.results = {}
+        self.total = len(jobs)
+        self.done = 0
+        self.generator = utils.bpy.img.ThumbnailGenerator(jobs, size=size)
+        return None
+
+    def start(self):
+        os.makedirs(self.index.lib_thumbnails, exist_ok=True)
+        os.makedirs(self.index.lib_proxies, exist_ok=True)
+        bpy.app.timers.register(self.poll, first_interval=self.INTERVAL, persistent=True)
+        return None
+
+    def poll(self):
+        try:
+            self.receive()
+        except Exception:
+            # NOTE: An error escaping the timer would unregister it and
+            ## leave the job showing as running forever.
+            traceback.print_exc()
+            self.cancel()
+            return None
+
+        if self.generator.pending:
+            return self.INTERVAL
+        self.finish()
+        return None
+
+    def receive(self):
+        for reply in self.generator.poll():
+            self.done += 1
+            job = reply["job"]
+            result = self.results.setdefault(job["hash"], {})
+            if reply["error"] is not None:
+                print("FAILED: ", os.path.basename(job["filepath"]), reply["error"])
+            elif job["kind"] == 'PROXY':
+                result["proxy"] = True
+            elif job["kind"] == 'ANALYSIS':
+                result["analysis"] = reply["result"]
+            else:
+                result["thumbnail"] = True
+                # NOTE: Icons not loaded yet are left to enum_items, which
+                ## keeps within the budget.
+                fn = os.path.basename(reply["result"])
+                if fn in bl_previews:
+                    previews.get(fn, reply["result"], reload=True)
+                previews.invalidate()
+        self.merge(library_index)
+        tag_redraw()
+        return None
+
+    def merge(self, index):
+        if index is None or index.library != self.index.library:
+            return None
+        for digest, result in self.results.items():
+            if digest in index.assets:
+                index.assets[digest].update(result)
+        return None
+
+    def save(self):
+        """Saves the live index with the results merged in, never the
+        snapshot the job started from.
+        """
+        index = library_index
+        if index is None or index.library != self.index.library or not index.ready:
+            return None
+        self.merge(index)
+        index.update_hdris()
+        index.save()
+        return None
+
+    def finish(self):
+        global thumbnail_job
+        try:
+            self.generator.close()
+            self.save()
+        finally:
+            thumbnail_job = None
+            tag_redraw()
+        return None
+
+    def cancel(self):
+        global thumbnail_job
+        try:
+            if bpy.app.timers.is_registered(self.poll):
+                bpy.app.timers.unregister(self.poll)
+            self.generator.cancel()
+            self.save()
+        finally:
+            thumbnail_job = None
+            tag_redraw()
+        return None
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+global thumbnail_job
+thumbnail_job = None
+
+def generate_thumbnails(force=False):
+    """Rescans the library, removing orphans, then generates what's missing."""
+    if thumbnail_job is not None:
+        return None
+    scan_library(callback=lambda: start_thumbnails(force), clean=True)
+    return None
+
+def start_thumbnails(force=False):
+    global thumbnail_job
+    if thumbnail_job is not None:
+        return None
+
+    jobs = reload_thumbnails(force=force)
+    if jobs:
+        thumbnail_job = ThumbnailJob(get_index(), jobs, size=addon.preferences.workers)
+        thumbnail_job.start()
+    return None
 
-def reload_previews(generate=False, force=False):
-    load_previews(reload_thumbnails(generate=generate, force=force))
+def tag_redraw():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'PROPERTIES':
+                area.tag_redraw()
     return None
 
+class PreviewCache():
+    """Keeps at most {budget} icons loaded in bl_previews, evicting the least
+    recently used first. Enum items are cached until the index, the search
+    or the selected HDRI changes.
+    """
+    def __init__(self):
+        self.order = collections.OrderedDict()
+        self.items = []
+        self.key = None
+        self.selected = None
+        return None
+
+    def get(self, fn, fp, reload=False):
+        if fn in bl_previews and reload:
+            # NOTE: load() raises KeyError for names already in the
+            ## collection, even with force_reload.
+            del bl_previews[fn]
+        if fn in bl_previews:
+            thumb = bl_previews[fn]
+        else:
+            thumb = bl_previews.load(fn, fp, 'IMAGE', force_reload=reload)
+        self.order[fn] = None
+        self.order.move_to_end(fn)
+        return thumb
+
+    def trim(self, budget, keep=()):
+        for fn in list(self.order):
+            if len(self.order) <= budget:
+                break
+            if fn not in keep:
+                del self.order[fn]
+                del bl_previews[fn]
+        return None
+
+    def invalidate(self):
+        self.key = None
+        return None
+
+    def clear(self):
+        bl_previews.clear()
+        self.order.clear()
+        self.items = []
+        self.invalidate()
+        return None
+
+    def enum_items(self, index, budget, query=""):
+        key = (index.generation, query, self.selected)
+        if self.key != key:
+            matches = index.search(query)
+            items = []
+            keep = set()
+            # NOTE: Only {budget} icons are loaded, the selected HDRI always
+            ## gets one, the rest of the items are listed without an icon.
+            loadable = budget - 1 if self.selected in index.hdris else budget
+            # NOTE: Numbers come from the whole library so the selection
+            ## survives filtering, and the selected HDRI is always listed.
+            for i, (name, path) in enumerate(sorted(index.hdris.items())):
+                if matches is not None and name not in matches and name != self.selected:
+                    continue
+                digest = index.files[path]["hash"]
+                if not index.assets[digest]["thumbnail"]:
+                    continue
+                fn = digest + ".jpg"
+                label = os.path.splitext(os.path.basename(path))[0]
+                if name == self.selected or loadable > 0:
+                    if name != self.selected:
+                        loadable -= 1
+                    icon_id = self.get(fn, index.get_thumbnail(digest)).icon_id
+                    keep.add(fn)
+                else:
+                    icon_id = 0
+                items.append((name, label, name, icon_id, i))
+            # NOTE: Icons of the current items are never evicted, Blender
+            ## would draw freed icons otherwise.
+            self.trim(budget, keep=keep)
+            # NOTE: Keeping a reference to the items is also required by
+            ## Blender for dynamic enums.
+            self.items = items
+            self.key = key
+        return self.items
+
+global previews
+previews = PreviewCache()
+
+def enum_previews(self, context):
+    return previews.enum_items(get_index(), addon.preferences.previews_budget, self.search)
+
 def audit_hdri():
     return get_hdri(addon.preferences, addon.session)
 
 def get_hdri(preferences, session):
-    reload_previews(force=True)
-    hdris = json.loads(session.hdris)
+    hdris = get_index().hdris
     if session.preview in hdris:
         path = hdris[session.preview]
         if os.path.exists(path):
-            return (os.path.basename(path), path)
+            return (session.preview, path)
         else:
             return False
     else:
         return False
 
 def get_tex(context, file):
-    if file[0] in context.blend_data.images:
-        tex = context.blend_data.images[file[0]]
+    for image in context.blend_data.images:
+        if image.get("ark_hdri") == file[0]:
+            return image
+
+    index = get_index()
+    asset = index.get_asset(file[0])
+    proxy = index.get_proxy(index.files[file[1]]["hash"])
+    if addon.preferences.use_proxies and asset is not None and asset["proxy"] and os.path.exists(proxy):
+        tex = context.blend_data.images.load(proxy)
+        tex.name = os.path.basename(file[1])
+        tex["ark_source"] = file[1]
+        tex["ark_proxy"] = proxy
     else:
         tex = context.blend_data.images.load(file[1])
+    tex["ark_hdri"] = file[0]
     return tex
 
+def use_full_resolution(scene):
+    """Points the proxy loaded by the scene's world to its original file."""
+    world = scene.world
+    if world is None or world.node_tree is None:
+        return None
+    n_env = world.node_tree.nodes.get("hdri.env")
+    if n_env is not None and n_env.image is not None and "ark_source" in n_env.image:
+        if n_env.image.filepath != n_env.image["ark_source"]:
+            n_env.image.filepath = n_env.image["ark_source"]
+    return None
+
+def use_proxies():
+    """Points every image swapped by use_full_resolution back to its proxy."""
+    for image in bpy.data.images:
+        if "ark_proxy" in image and image.filepath != image["ark_proxy"]:
+            image.filepath = image["ark_proxy"]
+    return None
+
+def use_sources():
+    """Points every proxy to its original file."""
+    for image in bpy.data.images:
+        if "ark_source" in image and image.filepath != image["ark_source"]:
+            image.filepath = image["ark_source"]
+    return None
+
+def viewport_uses_world():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type != 'VIEW_3D':
+                continue
+            shading = area.spaces.active.shading
+            if shading.type == 'MATERIAL' and shading.use_scene_world:
+                return True
+            if shading.type == 'RENDERED' and shading.use_scene_world_render:
+                return True
+    return False
+
+PROXY_INTERVAL = 0.5
+
+global rendering
+rendering = False
+
+def sync_proxies():
+    """Uses the proxies only while a viewport draws the scene world, images
+    nothing draws aren't loaded so renders get the originals for free.
+    """
+    # NOTE: Never swap while a render runs, the render thread may be
+    ## reading the images.
+    if rendering or bpy.app.is_job_running('RENDER'):
+        return PROXY_INTERVAL
+    if viewport_uses_world():
+        use_proxies()
+    else:
+        use_sources()
+    return PROXY_INTERVAL
+
+def get_proxies_in_use():
+    return [image.name for image in bpy.data.images
+            if "ark_proxy" in image and image.filepath == image["ark_proxy"]]
+
+# NOTE: Render handlers run on the render thread, they only flag the render
+## so sync_proxies leaves the images alone, and check without writing that
+## the render got the originals.
+@bpy.app.handlers.persistent
+def render_init(scene, *args):
+    global rendering
+    rendering = True
+    names = get_proxies_in_use()
+    if names:
+        print(f"WARNING: Rendering with HDRI proxies ({', '.join(names)}), render with F12/Ctrl+F12 or the render queue to use the originals.")
+    return None
+
+@bpy.app.handlers.persistent
+def render_end(scene, *args):
+    global rendering
+    rendering = False
+    return None
+
+class ARK_OT_RenderFullResolution(bpy.types.Operator):
+    """Render with the original HDRIs, swapped in on the main thread before the render starts"""
+    bl_idname = f"{addon.name}.render_full_resolution"
+    bl_label = "Render"
+    bl_options = {'INTERNAL'}
+
+    animation : bpy.props.BoolProperty()
+    use_viewport : bpy.props.BoolProperty()
+
+    def invoke(self, context, event):
+        global rendering
+        # NOTE: Flagged first, sync_proxies can't swap back before the
+        ## render job is registered.
+        rendering = True
+        use_sources()
+        result = bpy.ops.render.render('INVOKE_DEFAULT', animation=self.animation, use_viewport=self.use_viewport)
+        if 'RUNNING_MODAL' not in result:
+            rendering = False
+        return {'FINISHED'} if 'CANCELLED' not in result else {'CANCELLED'}
+
+# NOTE: Added to the addon keyconfig, which takes precedence over the
+## default F12 and Ctrl+F12.
+KEYMAP_ITEMS = [
+    ({"type" : 'F12', "value" : 'PRESS'}, {"animation" : False, "use_viewport" : True}),
+    ({"type" : 'F12', "value" : 'PRESS', "ctrl" : True}, {"animation" : True, "use_viewport" : True}),
+]
+
+global keymap_items
+keymap_items = []
+
+def register_keymaps():
+    keyconfig = bpy.context.window_manager.keyconfigs.addon
+    if keyconfig is None:
+        return None
+    keymap = keyconfig.keymaps.new(name="Screen", space_type='EMPTY')
+    for event, properties in KEYMAP_ITEMS:
+        item = keymap.keymap_items.new(ARK_OT_RenderFullResolution.bl_idname, **event)
+        for name, value in properties.items():
+            setattr(item.properties, name, value)
+        keymap_items.append((keymap, item))
+    return None
+
+def unregister_keymaps():
+    for keymap, item in keymap_items:
+        keymap.keymap_items.remove(item)
+    keymap_items.clear()
+    return None
+
+global saved_proxies
+saved_proxies = []
+
+@bpy.app.handlers.persistent
+def save_pre(*args):
+    """Files are saved pointing to the originals, so they render right on
+    machines without the proxies. filepath_raw doesn't reload the images.
+    """
+    saved_proxies.clear()
+    for image in bpy.data.images:
+        if "ark_source" in image and image.filepath_raw != image["ark_source"]:
+            saved_proxies.append((image, image.filepath_raw))
+            image.filepath_raw = image["ark_source"]
+    return None
+
+@bpy.app.handlers.persistent
+def save_post(*args):
+    for image, filepath in saved_proxies:
+        image.filepath_raw = filepath
+    saved_proxies.clear()
+    return None
+
 def handle_existing_world(world):
     session = addon.session
     w_nodes = world.node_tree.nodes
     if "hdri.env" in w_nodes and w_nodes["hdri.env"].image is not None:
-        existing = w_nodes["hdri.env"].image.name
+        image = w_nodes["hdri.env"].image
+        # NOTE: Images loaded before HDRIs were identified by their library
+        ## path only carry their name.
+        existing = image.get("ark_hdri", image.name)
         if existing != session.preview:
-            if existing in reload_thumbnails():
+            if get_index().has_thumbnail(existing):
+                previews.selected = existing
                 session.preview = existing
     return None
 
@@ -109,25 +895,37 @@ def apply_world(world, tex):
     world.node_tree.nodes["hdri.env"].image = tex
     return None
 
+def apply_analysis(world, analysis, preferences):
+    """Rotates the brightest region of the HDRI to the preferred sun
+    direction and scales the strength to the preferred mean luminance.
+    """
+    if preferences.use_auto_align:
+        get_mapping(world).default_value[2] = preferences.sun_azimuth - analysis["azimuth"]
+    if preferences.use_normalize_strength and analysis["luminance"] > 0:
+        strength = common.get_world_strength(world)
+        strength.default_value = preferences.target_luminance / analysis["luminance"]
+    return None
+
 def update_world(self, context):
     world = context.scene.world
     pr_world = getattr(world, addon.name)
 
     setup_world(world)
-    reload_thumbnails()
 
     if pr_world.kind == 'HDRI':
         preferences = addon.preferences
         session = addon.session
 
+        previews.selected = session.preview
         file = get_hdri(preferences, session)
         if file:
             tex = get_tex(context, file)
             apply_world(world, tex)
+            analysis = get_index().get_analysis(session.preview)
+            if analysis is not None:
+                apply_analysis(world, analysis, preferences)
         else:
             pass
-
-        reload_previews()
     return None
 
 def audit_world(world):
@@ -194,7 +992,21 @@ class ARK_OT_ReloadHDRIPreviews(bpy.types.Operator):
         return self.execute(context)
 
     def execute(self, context):
-        reload_previews(generate=True, force=self.shift)
+        generate_thumbnails(force=self.shift)
+        return {'INTERFACE'}
+
+class ARK_OT_CancelHDRIPreviews(bpy.types.Operator):
+    bl_idname = f"{addon.name}.cancel_previews"
+    bl_label = ""
+    bl_description = "Stop generating thumbnails"
+    bl_options = {'INTERNAL'}
+
+    @classmethod
+    def poll(cls, context):
+        return thumbnail_job is not None
+
+    def execute(self, context):
+        thumbnail_job.cancel()
         return {'INTERFACE'}
 
 class ARK_OT_CreateWorldHDRI(bpy.types.Operator):
@@ -208,17 +1020,24 @@ class ARK_OT_CreateWorldHDRI(bpy.types.Operator):
 
 @addon.property
 class WindowManager_Worlds_HDRI(bpy.types.PropertyGroup):
+    search : bpy.props.StringProperty(
+        name = "Search",
+        description = "Only show HDRIs whose folders, name or tags start with these words",
+        default = "",
+        options = {'TEXTEDIT_UPDATE'},
+    )
+
     preview : bpy.props.EnumProperty(
         items = enum_previews,
         update = update_world,
     )
 
-    hdris : bpy.props.StringProperty()
-
 @addon.property
 class Preferences_Worlds_HDRI(bpy.types.PropertyGroup):
     def update_library(self, context):
+        global library_index
         self.lib_thumbnails = os.path.join(self.library, "_thumbnails")
+        library_index = None
         return None
 
     library : bpy.props.StringProperty(
@@ -235,12 +1054,81 @@ class Preferences_Worlds_HDRI(bpy.types.PropertyGroup):
         subtype = 'DIR_PATH',
     )
 
+    previews_budget : bpy.props.IntProperty(
+        name = "Loaded Thumbnails",
+        description = "Maximum number of thumbnails kept in memory as icons, least recently used ones are unloaded first",
+        default = 1000,
+        min = 1,
+    )
+
+    use_proxies : bpy.props.BoolProperty(
+        name = "Use Proxies",
+        description = "Show downsampled copies of the HDRIs in the viewport, the original files are only loaded when rendering",
+        default = True,
+    )
+
+    proxy_size : bpy.props.IntProperty(
+        name = "Proxy Size",
+        description = "Width of the proxies",
+        default = 2048,
+        min = 256,
+        subtype = 'PIXEL',
+    )
+
+    use_auto_align : bpy.props.BoolProperty(
+        name = "Auto Align Sun",
+        description = "Rotate new HDRIs so their brightest region faces the Sun Direction",
+        default = False,
+    )
+
+    sun_azimuth : bpy.props.FloatProperty(
+        name = "Sun Direction",
+        description = "Azimuth the brightest region is aligned to, clockwise from +Y",
+        default = 0.0,
+        subtype = 'ANGLE',
+    )
+
+    use_normalize_strength : bpy.props.BoolProperty(
+        name = "Normalize Strength",
+        description = "Set the World strength of new HDRIs so their mean luminance matches the Target Luminance",
+        default = False,
+    )
+
+    target_luminance : bpy.props.FloatProperty(
+        name = "Target Luminance",
+        default = 1.0,
+        min = 0.0,
+    )
+
+    workers : bpy.props.IntProperty(
+        name = "Thumbnail Workers",
+        description = "Number of background Blender processes generating thumbnails, 0 uses one per core",
+        default = 0,
+        min = 0,
+    )
+
 def UI(preferences, layout):
     layout.prop(preferences, "library")
+    layout.prop(preferences, "previews_budget")
+    layout.prop(preferences, "use_proxies")
+    row = layout.row()
+    row.enabled = preferences.use_proxies
+    row.prop(preferences, "proxy_size")
+    layout.prop(preferences, "use_auto_align")
+    row = layout.row()
+    row.enabled = preferences.use_auto_align
+    row.prop(preferences, "sun_azimuth")
+    layout.prop(preferences, "use_normalize_strength")
+    row = layout.row()
+    row.enabled = preferences.use_normalize_strength
+    row.prop(preferences, "target_luminance")
+    layout.prop(preferences, "workers")
     return None
 
 CLASSES = [
+    ARK_OT_RenderFullResolution,
     ARK_OT_ReloadHDRIPreviews,
+    ARK_OT_CancelHDRIPreviews,
     ARK_OT_CreateWorldHDRI,
     WindowManager_Worlds_HDRI,
     Preferences_Worlds_HDRI,
@@ -251,10 +1139,33 @@ def register():
 
     global bl_previews
     bl_previews = bpy.utils.previews.new()
+
+    bpy.app.handlers.render_init.append(render_init)
+    bpy.app.handlers.render_complete.append(render_end)
+    bpy.app.handlers.render_cancel.append(render_end)
+    bpy.app.handlers.save_pre.append(save_pre)
+    bpy.app.handlers.save_post.append(save_post)
+    bpy.app.timers.register(sync_proxies, first_interval=PROXY_INTERVAL, persistent=True)
+    register_keymaps()
     return None
 
 def unregister():
+    unregister_keymaps()
+    if bpy.app.timers.is_registered(sync_proxies):
+        bpy.app.timers.unregister(sync_proxies)
+    bpy.app.handlers.save_post.remove(save_post)
+    bpy.app.handlers.save_pre.remove(save_pre)
+    bpy.app.handlers.render_cancel.remove(render_end)
+    bpy.app.handlers.render_complete.remove(render_end)
+    bpy.app.handlers.render_init.remove(render_init)
+
+    if thumbnail_job is not None:
+        thumbnail_job.cancel()
+    if library_scan is not None:
+        library_scan.cancel()
+
     global bl_previews
+    previews.clear()
     bl_previews = bpy.utils.previews.remove(bl_previews)
 
     utils.bpy.unregister_classes(CLASSES)
@@ -24,6 +24,8 @@ from ark import utils
 addon = utils.bpy.Addon()
 
 # --------------------------------------------------------------------------
+import csv
+import io
 import re
 
 class Parser:
@@ -33,20 +35,26 @@ class Parser:
         self.patterns = {}
         self.raw_patterns = {}
         self.virtual = {}
+        self.compiled = {}
 
     def add(self, name, pattern, virtual=False):
         """ Adds a new named pattern (regular expression) that can reference previously added patterns by %(pattern_name)s.
         Virtual patterns can be used to make expressions more compact but don't show up in the parse tree. """
         self.raw_patterns[name] = "(?:" + pattern + ")"
         self.virtual[name] = virtual
+        self.compiled.clear()
 
         try:
             self.patterns[name] = ("(?:" + pattern + ")") % self.patterns
         except KeyError as e:
             raise (Exception, "Unknown pattern name: %s" % str(e))
 
-    def parse(self, pattern_name, text):
-        """ Parses 'text' with pattern 'pattern_name' and returns parse tree """
+    def compile(self, pattern_name):
+        """ Returns the compiled pattern 'pattern_name' with its non virtual subpatterns as groups,
+        and the names of those subpatterns. Compiled once and cached until a pattern is added. """
+        compiled = self.compiled.get(pattern_name)
+        if compiled is not None:
+            return compiled
 
         # build pattern with subgroups
         sub_dict = {}
@@ -62,8 +70,15 @@ class Parser:
 
         pattern = "^" + (self.raw_patterns[pattern_name] % sub_dict) + "$"
 
+        compiled = self.compiled[pattern_name] = (re.compile(pattern), subpattern_names)
+        return compiled
+
+    def parse(self, pattern_name, text):
+        """ Parses 'text' with pattern 'pattern_name' and returns parse tree """
+        pattern, subpattern_names = self.compile(pattern_name)
+
         # do matching
-        m = re.match(pattern, text)
+        m = pattern.match(text)
 
         if m is None:
             return None
@@ -192,6 +207,31 @@ def parse_position(s):
 
     return lat, lon
 
+
+def parse_positions(strings):
+    """ Parses many positions at once, returns a list with a (latitude, longitude) tuple, or None
+    where parsing didn't succeed, for each string. """
+    return [parse_position(s) for s in strings]
+
+
+def read_sites(filepath):
+    """ Reads a CSV file of sites, the first column is the name and the rest the position in any
+    format parse_position accepts. Returns a list of (name, latitude, longitude) and the number of
+    rows that couldn't be parsed, e.g. a header. """
+    with open(filepath, newline="", encoding="utf-8-sig") as f:
+        text = f.read()
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    rows = [[cell.strip() for cell in row] for row in csv.reader(io.StringIO(text), dialect)]
+    rows = [row for row in rows if len(row) > 1 and any(row)]
+    positions = parse_positions(", ".join(row[1:]) for row in rows)
+
+    sites = [(row[0], *co) for row, co in zip(rows, positions) if co is not None]
+    return sites, len(rows) - len(sites)
+
 # --------------------------------------------------------------------------
 
 import datetime
@@ -202,7 +242,9 @@ TODAY = datetime.datetime.today()
 import datetime
 from math import degrees, radians, pi, sin, cos, asin, acos, tan, floor
 
+import math
 import mathutils
+import numpy as np
 
 class SunInfo:
     """
@@ -240,10 +282,11 @@ class SunInfo:
 sun = SunInfo()
 
 
-def move_sun(context):
+def move_sun(context, full=True):
     """
     Cycle through all the selected objects and set their position and rotation
-    in the sky.
+    in the sky. Sunrise, sunset and the object collection are skipped unless
+    {full} is set.
     """
     addon_prefs = addon.preferences
     sun_props = context.scene.world.ark.sun_position
@@ -280,20 +323,61 @@ def move_sun(context):
     if sun.use_daylight_savings:
         zone -= 1
 
-    if addon_prefs.show_rise_set:
+    if full and addon_prefs.show_rise_set:
         calc_sunrise_sunset(rise=True)
         calc_sunrise_sunset(rise=False)
 
     azimuth, elevation = get_sun_coordinates(
         local_time, sun_props.latitude, sun_props.longitude,
-        zone, sun_props.month, sun_props.day, sun_props.year)
+        zone, sun_props.month, sun_props.day, sun_props.year,
+        sun_props.use_refraction, sun_props.north_offset)
+
+    set_sun_direction(context.scene.world, context.view_layer.objects,
+                      azimuth, elevation)
+
+    # Sun collection
+    if (full and sun_props.object_collection is not None
+            and len(sun_props.object_collection.objects) > 0):
+        sun_objects = sun_props.object_collection.objects
+        object_count = len(sun_objects)
+        steps = np.arange(object_count)[::-1]
+        month, day = sun_props.month, sun_props.day
+        if sun_props.object_collection_type == 'DIURNAL':
+            # Diurnal motion
+            if object_count > 1:
+                time_increment = sun_props.time_spread / (object_count - 1)
+            else:
+                time_increment = sun_props.time_spread
+            local_time = local_time + time_increment * steps
+        else:
+            # Analemma, days past January carry over into the next months
+            day_increment = 365 / object_count
+            month = 1
+            day = np.floor(sun_props.day_of_year - 1 + day_increment * steps) + 1
+
+        azimuths, elevations = get_sun_coordinates_batch(
+            local_time, sun_props.latitude, sun_props.longitude, zone,
+            month, day, sun_props.year,
+            sun_props.use_refraction, sun_props.north_offset)
+        locations = get_sun_vectors(azimuths, elevations) * sun_props.sun_distance
+        for obj, location, azimuth, elevation in zip(sun_objects, locations, azimuths, elevations):
+            obj.location = location
+            obj.rotation_euler = (elevation - pi/2, 0, -azimuth)
+
+
+def set_sun_direction(world, objects, azimuth, elevation):
+    """
+    Point the sky texture and the sun object, if it's in {objects}, to the
+    given direction
+    """
+    sun_props = world.ark.sun_position
 
     sun.azimuth = azimuth
     sun.elevation = elevation
     sun_vector = get_sun_vector(azimuth, elevation)
 
     if sun_props.sky_texture:
-        sky_node = context.scene.world.node_tree.nodes.get(sun_props.sky_texture)
+        sky_node = world.node_tree.nodes.get(sun_props.sky_texture)
         if sky_node is not None and sky_node.type == "TEX_SKY":
             sky_node.texture_mapping.rotation.z = 0.0
             sky_node.sun_direction = sun_vector
@@ -302,46 +386,110 @@ def move_sun(context):
 
     # Sun object
     if (sun_props.sun_object is not None
-            and sun_props.sun_object.name in context.view_layer.objects):
+            and sun_props.sun_object.name in objects):
         obj = sun_props.sun_object
         obj.location = sun_vector * sun_props.sun_distance
         rotation_euler = mathutils.Euler((elevation - pi/2, 0, -azimuth))
         set_sun_rotations(obj, rotation_euler)
 
-    # Sun collection
-    if sun_props.object_collection is not None:
-        sun_objects = sun_props.object_collection.objects
-        object_count = len(sun_objects)
-        if sun_props.object_collection_type == 'DIURNAL':
-            # Diurnal motion
-            if object_count > 1:
-                time_increment = sun_props.time_spread / (object_count - 1)
-                local_time = local_time + time_increment * (object_count - 1)
-            else:
-                time_increment = sun_props.time_spread
 
-            for obj in sun_objects:
-                azimuth, elevation = get_sun_coordinates(
-                    local_time, sun_props.latitude,
-                    sun_props.longitude, zone,
-                    sun_props.month, sun_props.day)
-                obj.location = get_sun_vector(azimuth, elevation) * sun_props.sun_distance
-                local_time -= time_increment
-                obj.rotation_euler = ((elevation - pi/2, 0, -azimuth))
+def get_zones(sun_props, local_time, month, day, year, UTC_zone=None):
+    """
+    The utc_zone of get_sun_coordinates_batch for every sample, from the
+    timezone rules of each date when the timezone is available, otherwise
+    the fixed UTC zone and daylight savings
+    """
+    if sun_props.timezone:
+        offsets = utils.tz.get_offsets(sun_props.timezone, year, month, day, local_time)
+        if offsets is not None:
+            return -offsets
+    zone = -(sun_props.UTC_zone if UTC_zone is None else UTC_zone)
+    if sun_props.use_daylight_savings:
+        zone -= 1
+    return zone
+
+
+class SunTable:
+    """
+    Sun directions for every minute of every day of a year at one site,
+    interpolated on frame changes instead of running the NOAA model
+    """
+    DAYS = 367
+    MINUTES = 1441
+
+    def __init__(self):
+        self.key = None
+        self.vectors = None
+        self.month_starts = None
+
+    def update(self, sun_props):
+        # The timezone rules give the zone of each day, the current UTC zone
+        # follows the current date and would rebuild the table
+        if utils.tz.is_available(sun_props.timezone):
+            zone_key = sun_props.timezone
         else:
-            # Analemma
-            day_increment = 365 / object_count
-            day = sun_props.day_of_year + day_increment * (object_count - 1)
-            for obj in sun_objects:
-                dt = (datetime.date(sun_props.year, 1, 1) +
-                      datetime.timedelta(day - 1))
-                azimuth, elevation = get_sun_coordinates(
-                    local_time, sun_props.latitude,
-                    sun_props.longitude, zone,
-                    dt.month, dt.day, sun_props.year)
-                obj.location = get_sun_vector(azimuth, elevation) * sun_props.sun_distance
-                day -= day_increment
-                obj.rotation_euler = (elevation - pi/2, 0, -azimuth)
+            zone_key = -sun_props.UTC_zone - sun_props.use_daylight_savings
+        key = (sun_props.latitude, sun_props.longitude, zone_key,
+               sun_props.year, sun_props.use_refraction, sun_props.north_offset)
+        if key == self.key:
+            return
+
+        days, minutes = np.meshgrid(np.arange(1, self.DAYS + 1),
+                                    np.arange(self.MINUTES), indexing='ij')
+        times, days = minutes.ravel() / 60, days.ravel()
+        azimuth, elevation = get_sun_coordinates_batch(
+            times, sun_props.latitude, sun_props.longitude,
+            get_zones(sun_props, times, 1, days, sun_props.year),
+            1, days, sun_props.year,
+            sun_props.use_refraction, sun_props.north_offset)
+        # Directions interpolate across the 0/2pi azimuth seam, angles don't
+        self.vectors = get_sun_vectors(azimuth, elevation).reshape(
+            self.DAYS, self.MINUTES, 3).astype(np.float32)
+        self.month_starts = [0] + [month_day_to_day_of_year(sun_props.year, month, 1)
+                                   for month in range(1, 13)]
+        self.key = key
+
+    def day_of_year(self, sun_props):
+        if sun_props.use_day_of_year:
+            return sun_props.day_of_year
+        return self.month_starts[sun_props.month] + sun_props.day - 1
+
+    def lookup(self, day_of_year, time):
+        day = min(max(day_of_year - 1, 0.0), self.DAYS - 1)
+        minute = min(max(time * 60, 0.0), self.MINUTES - 1)
+        d0, m0 = int(day), int(minute)
+        d1, m1 = min(d0 + 1, self.DAYS - 1), min(m0 + 1, self.MINUTES - 1)
+        fd, fm = day - d0, minute - m0
+
+        v = self.vectors
+        x, y, z = ((v[d0, m0] * (1 - fm) + v[d0, m1] * fm) * (1 - fd) +
+                   (v[d1, m0] * (1 - fm) + v[d1, m1] * fm) * fd)
+        length = math.sqrt(x * x + y * y + z * z)
+        azimuth = math.atan2(x, y) % (2 * pi)
+        elevation = asin(max(-1.0, min(1.0, z / length)))
+        return azimuth, elevation
+
+
+sun_table = SunTable()
+
+
+@bpy.app.handlers.persistent
+def sun_frame_handler(scene, *args):
+    """
+    Looks the sun up in sun_table when playing back or rendering animated
+    times and dates, object collections aren't updated
+    """
+    world = scene.world
+    if world is None:
+        return
+    sun_props = world.ark.sun_position
+    if not sun_props.use_lookup_table or sun_props.usage_mode == "HDR":
+        return
+
+    sun_table.update(sun_props)
+    azimuth, elevation = sun_table.lookup(sun_table.day_of_year(sun_props),
+                                          sun_props.time)
+    set_sun_direction(world, scene.objects, azimuth, elevation)
 
 
 def day_of_year_to_month_day(year, day_of_year):
@@ -427,7 +575,8 @@ def format_lat_long(latitude, longitude):
 
 
 def get_sun_coordinates(local_time, latitude, longitude,
-                        utc_zone, month, day, year):
+                        utc_zone, month, day, year,
+                        use_refraction=None, north_offset=None):
     """
     Calculate the actual position of the sun based on input parameters.
 
@@ -442,8 +591,16 @@ def get_sun_coordinates(local_time, latitude, longitude,
     using the Azimuth and Solar Elevation displayed in the SunPos_Panel.
     NOAA's web site is:
                 http://www.esrl.noaa.gov/gmd/grad/solcalc
+
+    use_refraction and north_offset are read from the scene when not given.
+    Use get_sun_coordinates_batch to evaluate many positions at once.
     """
-    sun_props = bpy.context.scene.world.ark.sun_position
+    if use_refraction is None or north_offset is None:
+        sun_props = bpy.context.scene.world.ark.sun_position
+        if use_refraction is None:
+            use_refraction = sun_props.use_refraction
+        if north_offset is None:
+            north_offset = sun_props.north_offset
 
     longitude *= -1                   # for internal calculations
     utc_time = local_time + utc_zone  # Set Greenwich Meridian Time
@@ -497,7 +654,7 @@ def get_sun_coordinates(local_time, latitude, longitude,
 
     exoatm_elevation = 90.0 - degrees(zenith)
 
-    if sun_props.use_refraction:
+    if use_refraction:
         if exoatm_elevation > 85.0:
             refraction_correction = 0.0
         else:
@@ -519,11 +676,102 @@ def get_sun_coordinates(local_time, latitude, longitude,
     else:
         elevation = pi/2 - zenith
 
-    azimuth += sun_props.north_offset
+    azimuth += north_offset
 
     return azimuth, elevation
 
 
+def get_sun_coordinates_batch(local_time, latitude, longitude,
+                              utc_zone, month, day, year,
+                              use_refraction=True, north_offset=0.0):
+    """
+    Vectorized get_sun_coordinates, the arguments are broadcast against
+    each other and the azimuths and elevations are returned as arrays.
+
+    Days past the end of the month carry over into the next ones, so a
+    day of the year can be passed as the day of January.
+    """
+    local_time, latitude, longitude, utc_zone, month, day, year = (
+        np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (
+            local_time, latitude, longitude, utc_zone, month, day, year))))
+
+    longitude = -longitude
+    utc_time = local_time + utc_zone
+    latitude = np.radians(np.clip(latitude, -89.93, 89.93))
+
+    # Julian centuries since 1/1/2000 12:00 gmt, see get_julian_day
+    early = month <= 2
+    year = np.where(early, year - 1, year)
+    month = np.where(early, month + 12, month)
+    A = np.floor(year / 100)
+    B = 2 - A + np.floor(A / 4.0)
+    jd = (np.floor(365.25 * (year + 4716.0)) +
+          np.floor(30.6001 * (month + 1)) + day + B - 1524.5)
+    t = ((jd + utc_time / 24) - 2451545.0) / 36525.0
+
+    omega = np.radians(125.04 - 1934.136 * t)
+    epsilon = np.radians(
+        23.0 + 26.0 / 60 + (21.4480 - 46.8150) / 3600 * t -
+        (0.00059 / 3600) * t**2 + (0.001813 / 3600) * t**3 +
+        0.00256 * np.cos(omega))
+    mean_long = (280.46646 + 36000.76983 * t + 0.0003032 * t**2) % 360
+    m = np.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    center = ((1.914602 - 0.004817 * t - 0.000014 * t**2) * np.sin(m) +
+              (0.019993 - 0.000101 * t) * np.sin(m * 2) +
+              0.000289 * np.sin(m * 3))
+    L = np.radians(mean_long + center - 0.00569 - 0.00478 * np.sin(omega))
+    solar_dec = np.arcsin(np.sin(epsilon) * np.sin(L))
+
+    # Equation of time
+    e = 0.016708634 - 0.000042037 * t - 0.0000001267 * t ** 2
+    ml = np.radians(mean_long)
+    y = np.tan(epsilon / 2.0) ** 2
+    etime = (y * np.sin(2.0 * ml) - 2.0 * e * np.sin(m) +
+             4.0 * e * y * np.sin(m) * np.cos(2.0 * ml) -
+             0.5 * y ** 2 * np.sin(4.0 * ml) - 1.25 * e ** 2 * np.sin(2.0 * m))
+    eqtime = np.degrees(etime) * 4
+
+    time_correction = (eqtime - 4 * longitude) + 60 * utc_zone
+    true_solar_time = ((utc_time - utc_zone) * 60.0 + time_correction) % 1440
+
+    hour_angle = true_solar_time / 4.0 - 180.0
+    hour_angle = np.where(hour_angle < -180.0, hour_angle + 360.0, hour_angle)
+
+    csz = np.clip(np.sin(latitude) * np.sin(solar_dec) +
+                  np.cos(latitude) * np.cos(solar_dec) *
+                  np.cos(np.radians(hour_angle)), -1.0, 1.0)
+    zenith = np.arccos(csz)
+
+    az_denom = np.cos(latitude) * np.sin(zenith)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        az_rad = np.clip(((np.sin(latitude) * np.cos(zenith)) -
+                          np.sin(solar_dec)) / az_denom, -1.0, 1.0)
+    azimuth = pi - np.arccos(az_rad)
+    azimuth = np.where(hour_angle > 0.0, -azimuth, azimuth)
+    azimuth = np.where(np.abs(az_denom) > 0.001, azimuth,
+                       np.where(latitude > 0.0, pi, 0.0))
+    azimuth = np.where(azimuth < 0.0, azimuth + 2*pi, azimuth)
+
+    if use_refraction:
+        exoatm_elevation = 90.0 - np.degrees(zenith)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            te = np.tan(np.radians(exoatm_elevation))
+            refraction_correction = np.select(
+                (exoatm_elevation > 85.0,
+                 exoatm_elevation > 5.0,
+                 exoatm_elevation > -0.575),
+                (0.0,
+                 58.1 / te - 0.07 / (te ** 3) + 0.000086 / (te ** 5),
+                 1735.0 + exoatm_elevation * (-518.2 + exoatm_elevation * (
+                     103.4 + exoatm_elevation * (-12.79 + exoatm_elevation * 0.711)))),
+                -20.774 / te)
+        elevation = pi/2 - (zenith - np.radians(refraction_correction / 3600))
+    else:
+        elevation = pi/2 - zenith
+
+    return azimuth + north_offset, elevation
+
+
 def get_sun_vector(azimuth, elevation):
     """
     Convert the sun coordinates to cartesian
@@ -537,6 +785,16 @@ def get_sun_vector(azimuth, elevation):
     return mathutils.Vector((loc_x, loc_y, loc_z))
 
 
+def get_sun_vectors(azimuth, elevation):
+    """
+    Vectorized get_sun_vector, returns an array of shape (..., 3)
+    """
+    cos_elevation = np.cos(elevation)
+    return np.stack((np.sin(azimuth) * cos_elevation,
+                     np.cos(azimuth) * cos_elevation,
+                     np.sin(elevation)), axis=-1)
+
+
 def set_sun_rotations(obj, rotation_euler):
     rotation_quaternion = rotation_euler.to_quaternion()
     obj.rotation_quaternion = rotation_quaternion
@@ -697,52 +955,73 @@ def eccentricity_earth_orbit(t):
     return (0.016708634 - 0.000042037 * t - 0.0000001267 * t ** 2)
 
 
-def calc_surface(context):
-    coords = []
+def calc_surface(context, rows=6, columns=24):
+    """
+    Returns the vertices and triangle indices of the surface the Sun
+    sweeps between January and July, as a grid of {rows} dates by
+    {columns} times of the day
+    """
     sun_props = context.scene.world.ark.sun_position
     zone = -sun_props.UTC_zone
 
-    def get_surface_coordinates(time, month):
-        azimuth, elevation = get_sun_coordinates(
-            time, sun_props.latitude, sun_props.longitude,
-            zone, month, 1, sun_props.year)
-        sun_vector = get_sun_vector(azimuth, elevation) * sun_props.sun_distance
-        sun_vector.z = max(0, sun_vector.z)
-        return sun_vector
+    last_day = month_day_to_day_of_year(sun_props.year, 7, 1)
+    days, times = np.meshgrid(np.linspace(1, last_day, rows + 1),
+                              np.linspace(0, 24, columns + 1), indexing='ij')
 
-    for month in range(1, 7):
-        for time in range(24):
-            coords.append(get_surface_coordinates(time, month))
-            coords.append(get_surface_coordinates(time + 1, month))
-            coords.append(get_surface_coordinates(time, month + 1))
+    azimuth, elevation = get_sun_coordinates_batch(
+        times.ravel(), sun_props.latitude, sun_props.longitude,
+        zone, 1, days.ravel(), sun_props.year,
+        sun_props.use_refraction, sun_props.north_offset)
+    coords = get_sun_vectors(azimuth, elevation) * sun_props.sun_distance
+    coords[:, 2] = np.maximum(coords[:, 2], 0)
 
-            coords.append(get_surface_coordinates(time, month + 1))
-            coords.append(get_surface_coordinates(time + 1, month + 1))
-            coords.append(get_surface_coordinates(time + 1, month))
-    return coords
+    # Two triangles per quad, each vertex is evaluated once
+    corner = (np.arange(rows)[:, None] * (columns + 1) + np.arange(columns)).ravel()
+    right, below = corner + 1, corner + columns + 1
+    indices = np.stack((corner, right, below, below, below + 1, right), axis=-1)
+    return coords.astype(np.float32), indices.reshape(-1, 3).astype(np.int32)
 
 
-def calc_analemma(context, h):
-    vertices = []
+def calc_analemmas(context):
+    """
+    Returns the vertices above the horizon and the line indices of the
+    analemmas of every hour
+    """
     sun_props = context.scene.world.ark.sun_position
     zone = -sun_props.UTC_zone
-    for day_of_year in range(1, 367, 5):
-        day, month = day_of_year_to_month_day(sun_props.year, day_of_year)
-        azimuth, elevation = get_sun_coordinates(
-            h, sun_props.latitude, sun_props.longitude,
-            zone, month, day, sun_props.year)
-        sun_vector = get_sun_vector(azimuth, elevation) * sun_props.sun_distance
-        if sun_vector.z > 0:
-            vertices.append(sun_vector)
-    return vertices
+
+    hours, days = np.meshgrid(np.arange(24), np.arange(1, 367, 5), indexing='ij')
+    azimuth, elevation = get_sun_coordinates_batch(
+        hours.ravel(), sun_props.latitude, sun_props.longitude,
+        zone, 1, days.ravel(), sun_props.year,
+        sun_props.use_refraction, sun_props.north_offset)
+    coords = get_sun_vectors(azimuth, elevation) * sun_props.sun_distance
+
+    visible = coords[:, 2] > 0
+    coords = coords[visible]
+    hours = hours.ravel()[visible]
+    # Join consecutive visible vertices of the same hour
+    starts = np.flatnonzero(hours[:-1] == hours[1:])
+    indices = np.stack((starts, starts + 1), axis=-1)
+    return coords.astype(np.float32), indices.astype(np.int32)
 
 # --------------------------------------------------------------------------
 
 import bpy
-import math
 import gpu
 from gpu_extras.batch import batch_for_shader
 
+
+def overlay_key(sun_props):
+    """
+    Inputs the analemma and surface geometry depend on, time and the sun
+    object don't change them
+    """
+    return (sun_props.latitude, sun_props.longitude, sun_props.UTC_zone,
+            sun_props.year, sun_props.sun_distance, sun_props.north_offset,
+            sun_props.use_refraction)
+
+
 if bpy.app.background:  # ignore drawing in background mode
     def north_update(self, context):
         pass
@@ -796,21 +1075,30 @@ else:
     del shader_info
     del shader_interface
 
+    uniform_shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+
+    _north_batch = None
+    _north_offset = None
+
     def north_draw():
         """
         Set up the compass needle using the current north offset angle
         less 90 degrees.  This forces the unit circle to begin at the
         12 O'clock instead of 3 O'clock position.
         """
+        global _north_batch, _north_offset
         sun_props = bpy.context.scene.world.ark.sun_position
 
         color = (0.2, 0.6, 1.0, 0.7)
-        radius = 100
-        angle = -(sun_props.north_offset - math.pi / 2)
-        x = math.cos(angle) * radius
-        y = math.sin(angle) * radius
-        coords = mathutils.Vector((x, y, 0)), mathutils.Vector((0, 0, 0))
-        batch = batch_for_shader(shader, 'LINE_STRIP', {"position": coords})
+        if _north_offset != sun_props.north_offset:
+            radius = 100
+            angle = -(sun_props.north_offset - math.pi / 2)
+            x = math.cos(angle) * radius
+            y = math.sin(angle) * radius
+            coords = mathutils.Vector((x, y, 0)), mathutils.Vector((0, 0, 0))
+            _north_batch = batch_for_shader(shader, 'LINE_STRIP', {"position": coords})
+            _north_offset = sun_props.north_offset
+        batch = _north_batch
 
         matrix = bpy.context.region_data.perspective_matrix
         shader.uniform_float("u_ViewProjectionMatrix", matrix)
@@ -837,67 +1125,72 @@ else:
             _north_handle = None
 
     # Analemmas
+    # The batch is only rebuilt when overlay_key changes, the draw handler
+    # always draws the latest one.
 
-    def analemmas_draw(batch, shader):
-        shader.uniform_float("color", (1, 0, 0, 1))
-        batch.draw(shader)
+    _analemmas_batch = None
+    _analemmas_key = None
+
+    def analemmas_draw(shader):
+        if _analemmas_batch is not None:
+            shader.uniform_float("color", (1, 0, 0, 1))
+            _analemmas_batch.draw(shader)
 
     _analemmas_handle = None
 
     def analemmas_update(self, context):
-        global _analemmas_handle
+        global _analemmas_handle, _analemmas_batch, _analemmas_key
         sun_props = context.scene.world.ark.sun_position
         addon_prefs = addon.preferences
 
         if addon_prefs.show_overlays and sun_props.show_analemmas:
-            coords = []
-            indices = []
-            coord_offset = 0
-            for h in range(24):
-                analemma_verts = calc_analemma(context, h)
-                coords.extend(analemma_verts)
-                for i in range(len(analemma_verts) - 1):
-                    indices.append((coord_offset + i,
-                                    coord_offset + i+1))
-                coord_offset += len(analemma_verts)
-
-            shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-            batch = batch_for_shader(shader, 'LINES',
-                                    {"pos": coords}, indices=indices)
-
-            if _analemmas_handle is not None:
-                bpy.types.SpaceView3D.draw_handler_remove(_analemmas_handle, 'WINDOW')
-            _analemmas_handle = bpy.types.SpaceView3D.draw_handler_add(
-                analemmas_draw, (batch, shader), 'WINDOW', 'POST_VIEW')
+            key = overlay_key(sun_props)
+            if _analemmas_key != key:
+                coords, indices = calc_analemmas(context)
+                _analemmas_batch = batch_for_shader(uniform_shader, 'LINES',
+                                                    {"pos": coords}, indices=indices)
+                _analemmas_key = key
+
+            if _analemmas_handle is None:
+                _analemmas_handle = bpy.types.SpaceView3D.draw_handler_add(
+                    analemmas_draw, (uniform_shader,), 'WINDOW', 'POST_VIEW')
         elif _analemmas_handle is not None:
             bpy.types.SpaceView3D.draw_handler_remove(_analemmas_handle, 'WINDOW')
             _analemmas_handle = None
 
     # Surface
 
-    def surface_draw(batch, shader):
+    _surface_batch = None
+    _surface_key = None
+
+    def surface_draw(shader):
+        if _surface_batch is None:
+            return
         blend = gpu.state.blend_get()
         gpu.state.blend_set("ALPHA")
         shader.uniform_float("color", (.8, .6, 0, 0.2))
-        batch.draw(shader)
+        _surface_batch.draw(shader)
         gpu.state.blend_set(blend)
 
     _surface_handle = None
 
     def surface_update(self, context):
-        global _surface_handle
+        global _surface_handle, _surface_batch, _surface_key
         sun_props = context.scene.world.ark.sun_position
         addon_prefs = addon.preferences
 
         if addon_prefs.show_overlays and sun_props.show_surface:
-            coords = calc_surface(context)
-            shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-            batch = batch_for_shader(shader, 'TRIS', {"pos": coords})
-
-            if _surface_handle is not None:
-                bpy.types.SpaceView3D.draw_handler_remove(_surface_handle, 'WINDOW')
-            _surface_handle = bpy.types.SpaceView3D.draw_handler_add(
-                surface_draw, (batch, shader), 'WINDOW', 'POST_VIEW')
+            rows, columns = addon_prefs.surface_rows, addon_prefs.surface_columns
+            key = overlay_key(sun_props) + (rows, columns)
+            if _surface_key != key:
+                coords, indices = calc_surface(context, rows, columns)
+                _surface_batch = batch_for_shader(uniform_shader, 'TRIS',
+                                                  {"pos": coords}, indices=indices)
+                _surface_key = key
+
+            if _surface_handle is None:
+                _surface_handle = bpy.types.SpaceView3D.draw_handler_add(
+                    surface_draw, (uniform_shader,), 'WINDOW', 'POST_VIEW')
         elif _surface_handle is not None:
             bpy.types.SpaceView3D.draw_handler_remove(_surface_handle, 'WINDOW')
             _surface_handle = None
@@ -935,6 +1228,499 @@ class ARK_OT_SunPositionOpenGMaps(bpy.types.Operator):
         bpy.ops.wm.url_open(url=f"https://www.google.com/maps/place/{pr_world.sun_position.coordinates}")
         return {'INTERFACE'}
 
+
+class ARK_OT_SunPositionFindTimezone(bpy.types.Operator):
+    """Use the suggested timezone, from the nearest city it can be wrong near borders"""
+    bl_idname = f"{addon.name}.sunposition_find_timezone"
+    bl_label = ""
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    def execute(self, context):
+        sun_props = context.scene.world.ark.sun_position
+        sun_props.timezone = utils.tz.lookup(sun_props.latitude, sun_props.longitude)
+        if not utils.tz.is_available(sun_props.timezone):
+            self.report({'WARNING'}, f"Timezone {sun_props.timezone} isn't available, set the UTC zone by hand.")
+        else:
+            self.report({'INFO'}, f"Timezone set to {sun_props.timezone} from the nearest city, check the UTC zone is right.")
+        return {'FINISHED'}
+
+
+class ARK_UL_PROPERTIES_SunPositionSites(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "name", text="", emboss=False)
+        row.label(text=format_lat_long(item.latitude, item.longitude))
+
+
+class ARK_OT_SunPositionImportSites(bpy.types.Operator):
+    """Add the sites of a CSV file, one per row with the name first and then the coordinates"""
+    bl_idname = f"{addon.name}.sunposition_import_sites"
+    bl_label = "Import Sites"
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default="*.csv;*.txt", options={'HIDDEN'})
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        try:
+            sites, skipped = read_sites(self.filepath)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            self.report({'ERROR'}, f"Could not read {self.filepath}: {e}")
+            return {'CANCELLED'}
+
+        sun_props = context.scene.world.ark.sun_position
+        for name, latitude, longitude in sites:
+            site = sun_props.sites.add()
+            site.name = name
+            site.latitude, site.longitude = latitude, longitude
+
+        self.report({'INFO'}, f"Imported {len(sites)} sites, skipped {skipped} rows")
+        return {'FINISHED'}
+
+
+class ARK_OT_SunPositionAddSite(bpy.types.Operator):
+    """Store the current position as a site"""
+    bl_idname = f"{addon.name}.sunposition_add_site"
+    bl_label = ""
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    def execute(self, context):
+        sun_props = context.scene.world.ark.sun_position
+        site = sun_props.sites.add()
+        site.name = "Site"
+        site.latitude, site.longitude = sun_props.latitude, sun_props.longitude
+        sun_props.site_index = len(sun_props.sites) - 1
+        return {'FINISHED'}
+
+
+class ARK_OT_SunPositionRemoveSite(bpy.types.Operator):
+    bl_idname = f"{addon.name}.sunposition_remove_site"
+    bl_label = ""
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.world.ark.sun_position.sites) > 0
+
+    def execute(self, context):
+        sun_props = context.scene.world.ark.sun_position
+        sun_props.sites.remove(sun_props.site_index)
+        sun_props.site_index = min(sun_props.site_index, len(sun_props.sites) - 1)
+        return {'FINISHED'}
+
+
+class ARK_OT_SunPositionUseSite(bpy.types.Operator):
+    """Move to the selected site"""
+    bl_idname = f"{addon.name}.sunposition_use_site"
+    bl_label = ""
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    @classmethod
+    def poll(cls, context):
+        sun_props = context.scene.world.ark.sun_position
+        return 0 <= sun_props.site_index < len(sun_props.sites)
+
+    def execute(self, context):
+        sun_props = context.scene.world.ark.sun_position
+        site = sun_props.sites[sun_props.site_index]
+        sun_props.latitude, sun_props.longitude = site.latitude, site.longitude
+        return {'FINISHED'}
+
+# --------------------------------------------------------------------------
+
+def sample_property(id_data, data_path, frames, value):
+    """
+    Evaluate the F-curve animating {data_path} at {frames}, or repeat the
+    current {value} when it isn't animated
+    """
+    anim = id_data.animation_data
+    fcurve = None
+    if anim is not None and anim.action is not None:
+        fcurve = anim.action.fcurves.find(data_path)
+    if fcurve is None:
+        return np.full(len(frames), value, dtype=np.float64)
+    return np.array([fcurve.evaluate(frame) for frame in frames])
+
+
+def bake_fcurve(id_data, data_path, index, frames, values, group=None):
+    """
+    Replace the F-curve of {data_path}[{index}] with linear keyframes
+    """
+    anim = id_data.animation_data or id_data.animation_data_create()
+    if anim.action is None:
+        anim.action = bpy.data.actions.new(f"{id_data.name}Action")
+    fcurves = anim.action.fcurves
+
+    fcurve = fcurves.find(data_path, index=index)
+    if fcurve is not None:
+        fcurves.remove(fcurve)
+    fcurve = fcurves.new(data_path, index=index, action_group=group or "")
+
+    points = fcurve.keyframe_points
+    points.add(len(frames))
+    co = np.empty(len(frames) * 2, dtype=np.float32)
+    co[0::2] = frames
+    co[1::2] = values
+    points.foreach_set("co", co)
+    interpolation = bpy.types.Keyframe.bl_rna.properties["interpolation"].enum_items["LINEAR"].value
+    points.foreach_set("interpolation", np.full(len(frames), interpolation, dtype=np.int32))
+    fcurve.update()
+
+
+def get_rotation_channels(obj, azimuth, elevation):
+    """
+    Sun object rotations in the object's rotation mode, as a property name
+    and one array per channel, kept continuous between frames
+    """
+    azimuth = np.unwrap(azimuth)
+    if obj.rotation_mode == 'XYZ':
+        return "rotation_euler", (elevation - pi/2, np.zeros_like(azimuth), -azimuth)
+
+    channels = []
+    previous = None
+    for az, el in zip(azimuth, elevation):
+        quaternion = mathutils.Euler((el - pi/2, 0, -az)).to_quaternion()
+        if obj.rotation_mode == 'QUATERNION':
+            if previous is not None and quaternion.dot(previous) < 0:
+                quaternion.negate()
+            previous = quaternion
+            channels.append(tuple(quaternion))
+        elif obj.rotation_mode == 'AXIS_ANGLE':
+            axis, angle = quaternion.to_axis_angle()
+            channels.append((angle, *axis))
+        else:
+            previous = quaternion.to_euler(obj.rotation_mode, previous) if previous else quaternion.to_euler(obj.rotation_mode)
+            channels.append(tuple(previous))
+
+    path = {'QUATERNION': "rotation_quaternion", 'AXIS_ANGLE': "rotation_axis_angle"}.get(obj.rotation_mode, "rotation_euler")
+    return path, np.array(channels).T
+
+
+class ARK_OT_SunPositionBake(bpy.types.Operator):
+    """Bake the Sun position over the frame range to keyframes on the Sun object and sky texture, so rendering doesn't depend on handlers"""
+    bl_idname = f"{addon.name}.sunposition_bake"
+    bl_label = "Bake Sun Study"
+    bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
+
+    frame_step: bpy.props.IntProperty(
+        name="Frame Step",
+        description="Number of frames between keyframes",
+        min=1, default=1)
+
+    def execute(self, context):
+        scene = context.scene
+        world = scene.world
+        sun_props = world.ark.sun_position
+
+        if sun_props.usage_mode == "HDR":
+            self.report({'ERROR'}, "Baking is not available in Sun + HDR texture mode.")
+            return {'CANCELLED'}
+
+        obj = sun_props.sun_object
+        sky_node = world.node_tree.nodes.get(sun_props.sky_texture) if sun_props.sky_texture else None
+        if sky_node is not None and sky_node.type != "TEX_SKY":
+            sky_node = None
+        if obj is None and sky_node is None:
+            self.report({'ERROR'}, "No Sun object or sky texture to bake.")
+            return {'CANCELLED'}
+
+        frames = np.arange(scene.frame_start, scene.frame_end + 1, self.frame_step)
+
+        def sample(name):
+            return sample_property(world, f"ark.sun_position.{name}", frames, getattr(sun_props, name))
+
+        if sun_props.use_day_of_year:
+            month, day = 1, np.round(sample("day_of_year"))
+        else:
+            month, day = np.round(sample("month")), np.round(sample("day"))
+        time, year = sample("time"), np.round(sample("year"))
+        zone = get_zones(sun_props, time, month, day, year, UTC_zone=sample("UTC_zone"))
+
+        azimuth, elevation = get_sun_coordinates_batch(
+            time, sample("latitude"), sample("longitude"),
+            zone, month, day, year,
+            sun_props.use_refraction, sun_props.north_offset)
+
+        if obj is not None:
+            locations = get_sun_vectors(azimuth, elevation) * sun_props.sun_distance
+            for i in range(3):
+                bake_fcurve(obj, "location", i, frames, locations[:, i], "Object Transforms")
+            path, channels = get_rotation_channels(obj, azimuth, elevation)
+            for i, values in enumerate(channels):
+                bake_fcurve(obj, path, i, frames, values, "Object Transforms")
+
+        if sky_node is not None:
+            node_tree = world.node_tree
+            vectors = get_sun_vectors(azimuth, elevation)
+            for i in range(3):
+                bake_fcurve(node_tree, sky_node.path_from_id("sun_direction"), i, frames, vectors[:, i])
+            bake_fcurve(node_tree, sky_node.path_from_id("sun_elevation"), 0, frames, elevation)
+            bake_fcurve(node_tree, sky_node.path_from_id("sun_rotation"), 0, frames, np.unwrap(azimuth))
+
+        # The keyframes replace the frame handler
+        sun_props.use_lookup_table = False
+        self.report({'INFO'}, f"Baked {len(frames)} frames.")
+        return {'FINISHED'}
+
+# --------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+
+
+def get_scene_triangles(depsgraph):
+    """
+    World space vertices and triangles of every visible mesh, instances
+    included
+    """
+    vertices = []
+    triangles = []
+    offset = 0
+    for instance in depsgraph.object_instances:
+        obj = instance.object
+        if obj.type != 'MESH':
+            continue
+        mesh = obj.data
+        mesh.calc_loop_triangles()
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", tris)
+
+        matrix = np.array(instance.matrix_world, dtype=np.float32)
+        vertices.append(co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3])
+        triangles.append(tris.reshape(-1, 3) + offset)
+        offset += len(mesh.vertices)
+
+    if not vertices:
+        return np.empty((0, 3), np.float32), np.empty((0, 3), np.int32)
+    return np.concatenate(vertices), np.concatenate(triangles)
+
+
+def get_face_samples(obj, depsgraph, bias):
+    """
+    World space face centers of the evaluated mesh, moved {bias} along their
+    normals so rays don't hit their own face, and face normals. Returns None
+    when modifiers change the faces, the results couldn't be mapped back
+    """
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        count = len(mesh.polygons)
+        if count != len(obj.data.polygons):
+            return None
+        centers = np.empty(count * 3, dtype=np.float32)
+        normals = np.empty(count * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("center", centers)
+        mesh.polygons.foreach_get("normal", normals)
+    finally:
+        obj_eval.to_mesh_clear()
+
+    matrix = np.array(obj_eval.matrix_world, dtype=np.float32)
+    normal_matrix = np.array(obj_eval.matrix_world.to_3x3().inverted_safe().transposed(), dtype=np.float32)
+    centers = centers.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    normals = normals.reshape(-1, 3) @ normal_matrix.T
+    normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, None]
+    return centers + normals * bias, normals
+
+
+def write_sun_hours(mesh, hours, maximum):
+    """
+    Store the hours in a face attribute and as a heatmap in a color
+    attribute, blue for no sun up to red for {maximum}
+    """
+    for name in ("sun_hours", "SunHours"):
+        if name in mesh.attributes:
+            mesh.attributes.remove(mesh.attributes[name])
+
+    mesh.attributes.new("sun_hours", 'FLOAT', 'FACE').data.foreach_set("value", hours.astype(np.float32))
+
+    factor = hours / maximum if maximum > 0 else np.zeros_like(hours)
+    stops = (0.0, 0.5, 1.0)
+    colors = np.stack((np.interp(factor, stops, (0.0, 1.0, 1.0)),
+                       np.interp(factor, stops, (0.1, 0.9, 0.05)),
+                       np.interp(factor, stops, (1.0, 0.1, 0.0)),
+                       np.ones_like(factor)), axis=-1)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+
+    attribute = mesh.color_attributes.new("SunHours", 'BYTE_COLOR', 'CORNER')
+    attribute.data.foreach_set("color", np.repeat(colors, loop_totals, axis=0).astype(np.float32).ravel())
+    mesh.color_attributes.active_color = attribute
+    mesh.update()
+
+
+class ARK_OT_SunPositionInsolation(bpy.types.Operator):
+    """Count the hours of direct sun each face of the selected meshes receives over a range of days, shadows from the whole scene included"""
+    bl_idname = f"{addon.name}.sunposition_insolation"
+    bl_label = "Sun Hours Analysis"
+    bl_options = {'UNDO', 'INTERNAL'}
+
+    day_start: bpy.props.IntProperty(
+        name="First Day",
+        description="First day of the year analyzed",
+        min=1, max=366, default=1)
+
+    day_end: bpy.props.IntProperty(
+        name="Last Day",
+        description="Last day of the year analyzed",
+        min=1, max=366, default=365)
+
+    day_step: bpy.props.IntProperty(
+        name="Day Step",
+        description="Days between samples, each sample stands for this many days",
+        min=1, max=366, default=7)
+
+    time_step: bpy.props.FloatProperty(
+        name="Time Step",
+        description="Hours between samples during a day",
+        min=0.05, max=24.0, default=0.5)
+
+    bias: bpy.props.FloatProperty(
+        name="Bias",
+        description="Distance rays start away from the faces, to avoid self intersections",
+        unit="LENGTH",
+        min=0.0, default=0.01)
+
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description="Number of background Blender processes casting rays, 0 uses one per core",
+        min=0, default=0)
+
+    _timer = None
+    pool = None
+    folder = None
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        sun_props = context.scene.world.ark.sun_position
+        depsgraph = context.evaluated_depsgraph_get()
+
+        days, times = np.meshgrid(np.arange(self.day_start, self.day_end + 1, self.day_step),
+                                  np.arange(0.0, 24.0, self.time_step), indexing='ij')
+        times, days = times.ravel(), days.ravel()
+        azimuth, elevation = get_sun_coordinates_batch(
+            times, sun_props.latitude, sun_props.longitude,
+            get_zones(sun_props, times, 1, days, sun_props.year),
+            1, days, sun_props.year,
+            sun_props.use_refraction, sun_props.north_offset)
+        directions = get_sun_vectors(azimuth, elevation)[elevation > 0]
+        if len(directions) == 0:
+            self.report({'WARNING'}, "The Sun never rises in this range.")
+            return {'CANCELLED'}
+
+        self.targets = []
+        samples = []
+        for obj in context.selected_objects:
+            if obj.type != 'MESH':
+                continue
+            sample = get_face_samples(obj, depsgraph, self.bias)
+            if sample is None:
+                self.report({'WARNING'}, f"Skipping {obj.name}, its modifiers change its faces.")
+                continue
+            self.targets.append((obj.name, len(sample[0])))
+            samples.append(sample)
+        if not samples or sum(count for _, count in self.targets) == 0:
+            self.report({'WARNING'}, "The selected meshes have no faces to analyze.")
+            return {'CANCELLED'}
+        origins = np.concatenate([o for o, _ in samples])
+        normals = np.concatenate([n for _, n in samples])
+
+        vertices, triangles = get_scene_triangles(depsgraph)
+        self.folder = tempfile.mkdtemp(prefix="ark_insolation_")
+        filepath = os.path.join(self.folder, "scene.npz")
+        np.savez(filepath, vertices=vertices, triangles=triangles,
+                 origins=origins, normals=normals, directions=directions)
+
+        self.pool = utils.bpy.workers.Pool(
+            os.path.join(utils.bpy.workers.SCRIPTS, "insolation_worker.py"),
+            size=self.workers)
+        # Small chunks keep every worker busy until the end
+        chunk = max(1, -(-len(origins) // (self.pool.size * 8)))
+        for start in range(0, len(origins), chunk):
+            self.pool.submit({"filepath" : filepath, "start" : start, "stop" : min(start + chunk, len(origins))})
+
+        self.counts = np.zeros(len(origins), dtype=np.float64)
+        self.done = 0
+        self.error = None
+        wm = context.window_manager
+        wm.progress_begin(0, len(origins))
+
+        if bpy.app.background:
+            # Modal operators don't run without an event loop
+            for reply in self.pool.as_completed():
+                self.receive(reply)
+            return self.finish(context)
+
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def receive(self, reply):
+        if reply["error"] is not None:
+            self.error = reply["error"]
+            self.pool.cancel()
+            return
+        job = reply["job"]
+        self.counts[job["start"]:job["stop"]] = reply["result"]
+        self.done += job["stop"] - job["start"]
+        bpy.context.window_manager.progress_update(self.done)
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cleanup(context)
+            self.report({'INFO'}, "Sun hours analysis cancelled.")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        for reply in self.pool.poll():
+            self.receive(reply)
+        if self.pool.pending and self.error is None:
+            return {'PASS_THROUGH'}
+        return self.finish(context)
+
+    def cleanup(self, context):
+        wm = context.window_manager
+        if self._timer is not None:
+            wm.event_timer_remove(self._timer)
+            self._timer = None
+        wm.progress_end()
+        if self.pool.pending:
+            self.pool.cancel()
+        else:
+            self.pool.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def finish(self, context):
+        self.cleanup(context)
+        if self.error is not None:
+            self.report({'ERROR'}, f"Sun hours analysis failed: {self.error}")
+            return {'CANCELLED'}
+
+        hours = self.counts * self.time_step * self.day_step
+        maximum = hours.max()
+        offset = 0
+        for name, count in self.targets:
+            obj = bpy.data.objects.get(name)
+            # The mesh can change while the workers run
+            if obj is not None and obj.type == 'MESH' and len(obj.data.polygons) == count:
+                write_sun_hours(obj.data, hours[offset:offset + count], maximum)
+            offset += count
+
+        self.report({'INFO'}, f"Up to {maximum:.0f} sun hours on {len(hours)} faces.")
+        return {'FINISHED'}
+
 # --------------------------------------------------------------------------
 
 parse_success = True
@@ -946,6 +1732,45 @@ def lat_long_update(self, context):
     sun_update(self, context)
 
 
+# Set while the timezone writes the UTC zone, so only edits by the user
+# count as overriding it
+setting_offset = False
+
+
+def utc_zone_update(self, context):
+    """
+    Editing the UTC zone or daylight savings drops the timezone, the
+    suggested one can be wrong and the edit is the correction
+    """
+    if self.timezone and not setting_offset:
+        self.timezone = ""
+        return
+    sun_update(self, context)
+
+
+def update_utc_offset(sun_props):
+    """
+    Set the UTC zone and daylight savings the timezone has on the current
+    date. Only differing values are written, their updates end up here again
+    """
+    if not sun_props.timezone:
+        return
+    offset = utils.tz.get_offset(sun_props.timezone, sun_props.year,
+                                 sun_props.month, sun_props.day, sun_props.time)
+    if offset is None:
+        return
+    UTC_zone, dst = offset
+    global setting_offset
+    setting_offset = True
+    try:
+        if sun_props.UTC_zone != UTC_zone:
+            sun_props.UTC_zone = UTC_zone
+        if sun_props.use_daylight_savings != (dst != 0):
+            sun_props.use_daylight_savings = dst != 0
+    finally:
+        setting_offset = False
+
+
 def get_coordinates(self):
     if parse_success:
         return format_lat_long(self.latitude, self.longitude)
@@ -965,18 +1790,55 @@ def set_coordinates(self, value):
     sun_update(self, bpy.context)
 
 
+SUN_UPDATE_DELAY = 0.2
+
+
 def sun_update(self, context):
+    """
+    Move the Sun right away, the rest is recomputed once after changes
+    stop for SUN_UPDATE_DELAY seconds, e.g. when a slider is released
+    """
+    update_time(context)
+    update_utc_offset(context.scene.world.ark.sun_position)
+    move_sun(context, full=False)
+
+    if bpy.app.background:
+        # Timers don't run without an event loop
+        sun_update_settled()
+        return
+    if bpy.app.timers.is_registered(sun_update_settled):
+        bpy.app.timers.unregister(sun_update_settled)
+    bpy.app.timers.register(sun_update_settled, first_interval=SUN_UPDATE_DELAY)
+
+
+def sun_update_settled():
+    context = bpy.context
+    if context.scene.world is None:
+        return None
     sun_props = context.scene.world.ark.sun_position
 
     update_time(context)
     move_sun(context)
 
     if sun_props.show_surface:
-        surface_update(self, context)
+        surface_update(None, context)
     if sun_props.show_analemmas:
-        analemmas_update(self, context)
+        analemmas_update(None, context)
     if sun_props.show_north:
-        north_update(self, context)
+        north_update(None, context)
+    return None
+
+
+class World_SunPosition_Site(bpy.types.PropertyGroup):
+    latitude: bpy.props.FloatProperty(
+        name="Latitude",
+        soft_min=-90.0, soft_max=90.0,
+        precision=3, default=0.0)
+
+    longitude: bpy.props.FloatProperty(
+        name="Longitude",
+        soft_min=-180.0, soft_max=180.0,
+        precision=3, default=0.0)
 
 
 class World_SunPosition(bpy.types.PropertyGroup):
@@ -994,7 +1856,7 @@ class World_SunPosition(bpy.types.PropertyGroup):
         name="Daylight Savings",
         description="Daylight savings time adds 1 hour to standard time",
         default=False,
-        update=sun_update)
+        update=utc_zone_update)
 
     use_refraction: bpy.props.BoolProperty(
         name="Use Refraction",
@@ -1109,12 +1971,18 @@ class World_SunPosition(bpy.types.PropertyGroup):
         min=1, max=366, default=1,
         update=sun_update)
 
+    timezone: bpy.props.StringProperty(
+        name="Timezone",
+        description="IANA timezone, sets the UTC zone and daylight savings for each date until they're edited",
+        default="",
+        update=sun_update)
+
     UTC_zone: bpy.props.FloatProperty(
         name="UTC Zone",
         description="Difference from Greenwich, England, in hours",
         precision=1,
         min=-14.0, max=13, step=50, default=0.0,
-        update=sun_update)
+        update=utc_zone_update)
 
     time: bpy.props.FloatProperty(
         name="Time",
@@ -1188,6 +2056,13 @@ class World_SunPosition(bpy.types.PropertyGroup):
         default=False,
         update=sun_update)
 
+    use_lookup_table: bpy.props.BoolProperty(
+        name="Fast Playback",
+        description="Precompute the Sun position for every minute of the year and interpolate it on frame changes. "
+                    "Only the Sun object and sky texture follow the animation",
+        default=False,
+        update=sun_update)
+
     time_spread: bpy.props.FloatProperty(
         name="Time Spread",
         description="Time period around which to spread object collection",
@@ -1195,6 +2070,12 @@ class World_SunPosition(bpy.types.PropertyGroup):
         soft_min=1.0, soft_max=24.0, step=1.0, default=23.0,
         update=sun_update)
 
+    sites: bpy.props.CollectionProperty(type=World_SunPosition_Site)
+
+    site_index: bpy.props.IntProperty(
+        name="",
+        default=0)
+
 @addon.property
 class Preferences_Worlds_SunPosition(bpy.types.PropertyGroup):
     show_overlays: bpy.props.BoolProperty(
@@ -1222,6 +2103,20 @@ class Preferences_Worlds_SunPosition(bpy.types.PropertyGroup):
         default=True
     )
 
+    surface_rows: bpy.props.IntProperty(
+        name="Surface Dates",
+        description="Number of dates between January and July the Sun surface is divided into",
+        min=1, soft_max=182, default=6,
+        update=surface_update
+    )
+
+    surface_columns: bpy.props.IntProperty(
+        name="Surface Hours",
+        description="Number of times of the day the Sun surface is divided into",
+        min=1, soft_max=1440, default=24,
+        update=surface_update
+    )
+
 def UI(preferences, layout):
     split = layout.row(align=True).split(factor=0.245)
     split.label(text="Overlays")
@@ -1231,11 +2126,26 @@ def UI(preferences, layout):
     col.prop(preferences, "show_refraction", toggle=True)
     col.prop(preferences, "show_az_el", toggle=True)
     col.prop(preferences, "show_rise_set", toggle=True)
+
+    split = layout.row(align=True).split(factor=0.245)
+    split.label(text="Sun Surface")
+    col = split.column(align=True)
+    col.prop(preferences, "surface_rows")
+    col.prop(preferences, "surface_columns")
     return None
 
 CLASSES = [
+    ARK_OT_SunPositionBake,
+    ARK_OT_SunPositionInsolation,
     ARK_OT_SunPositionPasteGMaps,
     ARK_OT_SunPositionOpenGMaps,
+    ARK_OT_SunPositionFindTimezone,
+    ARK_OT_SunPositionImportSites,
+    ARK_OT_SunPositionAddSite,
+    ARK_OT_SunPositionRemoveSite,
+    ARK_OT_SunPositionUseSite,
+    ARK_UL_PROPERTIES_SunPositionSites,
+    World_SunPosition_Site,
     World_SunPosition,
     Preferences_Worlds_SunPosition,
 ]
@@ -1247,8 +2157,12 @@ PROPS = [
 def register():
     utils.bpy.register_classes(CLASSES)
     addon.set_properties(PROPS)
+    bpy.app.handlers.frame_change_post.append(sun_frame_handler)
     return None
 
 def unregister():
+    bpy.app.handlers.frame_change_post.remove(sun_frame_handler)
+    if bpy.app.timers.is_registered(sun_update_settled):
+        bpy.app.timers.unregister(sun_update_settled)
     utils.bpy.unregister_classes(CLASSES)
     return None
\ No newline at end of file